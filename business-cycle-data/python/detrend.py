@@ -0,0 +1,280 @@
+'''Trend and cycle decompositions for the business cycle data.
+
+Every filter has the same interface: it takes a DataFrame whose columns are complete over its index and returns
+DataFrames of the cyclical and trend components with the same index and columns. The filters are:
+
+    hp            Two-sided Hodrick-Prescott filter (see hp_filter.py)
+    hp_one_sided  One-sided HP filter. The trend at each date is the last value of the HP trend of the data through
+                  that date, computed with the Kalman filter.
+    bk            Baxter-King band pass filter
+    cf            Christiano-Fitzgerald band pass filter
+    hamilton      Hamilton (2018) regression filter
+
+detrend applies one filter to a dictionary of Series and detrend_all applies several at once. The one-sided HP and
+Hamilton filters can be extended by one date at a time with start and update instead of filtering the whole history
+again. The default parameters are for quarterly data.'''
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from statsmodels.tsa.filters.bk_filter import bkfilter
+from statsmodels.tsa.filters.cf_filter import cffilter
+from hp_filter import hp_filter
+
+# Transition matrix of the state (trend, lagged trend) in the state space form of the HP filter
+_F = np.array([[2.,-1.],[1.,0.]])
+
+# Kalman gains and final state covariances of the one-sided HP filter by (T, lamb)
+_gains = {}
+
+
+def hp(df,lamb=1600):
+
+    '''Two-sided HP filter'''
+
+    return hp_filter(df,lamb=lamb)
+
+
+def _kalman_step(P,lamb):
+
+    '''Returns the Kalman gain and the updated state covariance of the one-sided HP filter given the previous state
+    covariance P. The variance of the cycle is normalized to one so the variance of the second difference of the
+    trend is 1/lamb. Neither depends on the data.'''
+
+    P = _F@P@_F.T
+    P[0,0] += 1/lamb
+    K = P[:,0]/(P[0,0]+1)
+
+    return K, P-np.outer(K,P[0])
+
+
+def _hp_one_sided_gains(T,lamb):
+
+    '''Returns the Kalman gains for dates 2, ..., T-1 and the state covariance at date T-1. With a diffuse prior, the
+    state after the first two observations equals those observations with covariance equal to the identity.'''
+
+    if (T,lamb) not in _gains:
+
+        P = np.eye(2)
+        gains = np.zeros((max(T-2,0),2))
+        for t in range(len(gains)):
+            gains[t], P = _kalman_step(P,lamb)
+
+        _gains[(T,lamb)] = (gains,P)
+
+    return _gains[(T,lamb)]
+
+
+def _hp_one_sided_state(df,lamb=1600):
+
+    values = np.asarray(df,dtype=float)
+    gains, P = _hp_one_sided_gains(len(values),lamb)
+
+    trend = values.copy()
+    x = values[1::-1].copy()
+    for t, K in enumerate(gains,start=2):
+        x = _F@x
+        x = x+np.outer(K,values[t]-x[0])
+        trend[t] = x[0]
+
+    # The trend of the first two dates is the data itself, so they have no cycle
+    trend[:2] = np.nan
+    trend = pd.DataFrame(trend,index=df.index,columns=df.columns)
+
+    return {'x':x,'P':P,'lamb':lamb,'cycle':df-trend,'trend':trend}
+
+
+def _hp_one_sided_update(state,values):
+
+    K, state['P'] = _kalman_step(state['P'],state['lamb'])
+    x = _F@state['x']
+    state['x'] = x+np.outer(K,values-x[0])
+
+    return state['x'][0]
+
+
+def hp_one_sided(df,lamb=1600):
+
+    '''One-sided HP filter. The first two dates have no cycle.'''
+
+    state = _hp_one_sided_state(df,lamb)
+
+    return state['cycle'], state['trend']
+
+
+def bk(df,low=6,high=32,K=12):
+
+    '''Baxter-King filter for cycles between low and high periods with a moving average of 2K+1 terms. The first and
+    last K dates have no cycle. The trend is the data less the cycle.'''
+
+    cycle = np.full(df.shape,np.nan)
+    cycle[K:len(df)-K] = bkfilter(np.asarray(df,dtype=float),low=low,high=high,K=K)
+
+    cycle = pd.DataFrame(cycle,index=df.index,columns=df.columns)
+
+    return cycle, df-cycle
+
+
+def cf(df,low=6,high=32,drift=True):
+
+    '''Christiano-Fitzgerald asymmetric filter for cycles between low and high periods. The drift is removed first
+    if drift is True.'''
+
+    cycle, trend = cffilter(np.asarray(df,dtype=float),low=low,high=high,drift=drift)
+
+    cycle = pd.DataFrame(np.reshape(cycle,df.shape),index=df.index,columns=df.columns)
+
+    return cycle, df-cycle
+
+
+def _hamilton_regressors(values,h,p):
+
+    '''Returns an array with shape (dates-p+1, columns, p+1) of the regressors (1, y[t-p+1], ..., y[t]) for each
+    date t from p-1 to the end of values'''
+
+    windows = sliding_window_view(values,p,axis=0)
+    constant = np.ones(windows.shape[:2]+(1,))
+
+    return np.concatenate([constant,windows],axis=2)
+
+
+def _hamilton_state(df,h=8,p=4):
+
+    values = np.asarray(df,dtype=float)
+    X = _hamilton_regressors(values,h,p)[:len(values)-h-p+1]
+    y = values[h+p-1:]
+
+    state = {'values':values,'h':h,'p':p,'index':df.index,'columns':df.columns,
+             'XX':np.einsum('tni,tnj->nij',X,X),'Xy':np.einsum('tni,tn->ni',X,y)}
+    _hamilton_fit(state)
+
+    return state
+
+
+def _hamilton_fit(state):
+
+    '''Sets the trend and cycle of state from the stored cross products of the regressors'''
+
+    values, h, p = state['values'], state['h'], state['p']
+    beta = np.linalg.solve(state['XX'],state['Xy'][:,:,None])[:,:,0]
+
+    trend = np.full(values.shape,np.nan)
+    trend[h+p-1:] = np.einsum('tni,ni->tn',_hamilton_regressors(values,h,p)[:len(values)-h-p+1],beta)
+
+    state['beta'] = beta
+    state['trend'] = pd.DataFrame(trend,index=state['index'],columns=state['columns'])
+    state['cycle'] = pd.DataFrame(values-trend,index=state['index'],columns=state['columns'])
+
+
+def _hamilton_update(state,date,values):
+
+    h, p = state['h'], state['p']
+    state['values'] = np.vstack([state['values'],values])
+    state['index'] = state['index'].append(pd.DatetimeIndex([date]))
+
+    x = np.concatenate([np.ones((1,len(values))),state['values'][-h-p:-h]]).T
+    state['XX'] += x[:,:,None]*x[:,None,:]
+    state['Xy'] += x*values[:,None]
+
+    _hamilton_fit(state)
+
+
+def hamilton(df,h=8,p=4):
+
+    '''Hamilton filter. The trend at t+h is the fitted value of the regression of y[t+h] on a constant and y[t],
+    ..., y[t-p+1]. The first h+p-1 dates have no cycle.'''
+
+    state = _hamilton_state(df,h,p)
+
+    return state['cycle'], state['trend']
+
+
+# Filters by name
+filters = {'hp':hp,'hp_one_sided':hp_one_sided,'bk':bk,'cf':cf,'hamilton':hamilton}
+
+
+def groups(series):
+
+    '''Returns a list of DataFrames of the Series in the dictionary series with missing values at the ends of each
+    Series dropped. Series with the same remaining dates are in the same DataFrame.'''
+
+    grouped = {}
+    for name, s in series.items():
+        s = s.loc[s.first_valid_index():s.last_valid_index()]
+        grouped.setdefault((s.index[0],s.index[-1],len(s)),{})[name] = s
+
+    return [pd.DataFrame(group) for group in grouped.values()]
+
+
+def detrend(series,method='hp',**parameters):
+
+    '''Returns DataFrames of the cyclical and trend components of the Series in the dictionary series computed with
+    the filter named method. parameters are passed to the filter. Series with the same dates are filtered together.
+    The columns of the results are the keys of series and the index is the union of the dates.'''
+
+    cycles = []
+    trends = []
+    for group in groups(series):
+        cycle, trend = filters[method](group,**parameters)
+        cycles.append(cycle)
+        trends.append(trend)
+
+    return pd.concat(cycles,axis=1)[list(series)], pd.concat(trends,axis=1)[list(series)]
+
+
+def detrend_all(series,methods=None):
+
+    '''Returns DataFrames of the cyclical and trend components of the Series in the dictionary series computed with
+    several filters. methods is a dictionary mapping filter names to dictionaries of parameters and every filter is
+    used with its default parameters if methods is None. The columns of the results have two levels: filter and
+    series.'''
+
+    if methods is None:
+        methods = {method:{} for method in filters}
+
+    results = {method:detrend(series,method,**parameters) for method, parameters in methods.items()}
+
+    cycle = pd.concat({method:results[method][0] for method in methods},axis=1,names=['filter','series'])
+    trend = pd.concat({method:results[method][1] for method in methods},axis=1,names=['filter','series'])
+
+    return cycle, trend
+
+
+def start(df,method,**parameters):
+
+    '''Filters the columns of df with the one-sided HP (method='hp_one_sided') or Hamilton (method='hamilton') filter
+    and returns a state to pass to update. The cycle and trend are state['cycle'] and state['trend'].'''
+
+    if method == 'hp_one_sided':
+        state = _hp_one_sided_state(df,**parameters)
+    elif method == 'hamilton':
+        state = _hamilton_state(df,**parameters)
+    else:
+        raise ValueError('Only the hp_one_sided and hamilton filters can be updated. method: '+str(method))
+
+    state['method'] = method
+
+    return state
+
+
+def update(state,date,values):
+
+    '''Extends the filter in state by one date and returns the cycle and trend through that date. values are the
+    observations at date, in the order of the columns of the DataFrame passed to start.
+
+    The one-sided HP trend at earlier dates does not change, so one step of the Kalman filter gives the new trend.
+    The Hamilton regression is refit from the stored cross products of the regressors, so its trend changes at every
+    date.'''
+
+    values = np.asarray(values,dtype=float)
+
+    if state['method'] == 'hp_one_sided':
+        trend = _hp_one_sided_update(state,values)
+        columns = state['trend'].columns
+        row = pd.DataFrame([trend],index=pd.DatetimeIndex([date]),columns=columns)
+        state['trend'] = pd.concat([state['trend'],row])
+        state['cycle'] = pd.concat([state['cycle'],pd.DataFrame([values],index=row.index,columns=columns)-row])
+    else:
+        _hamilton_update(state,date,values)
+
+    return state['cycle'], state['trend']
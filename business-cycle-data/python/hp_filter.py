@@ -0,0 +1,52 @@
+'''Batched Hodrick-Prescott filter.
+
+The HP trend of a series x with T observations solves (I + lamb*K'K) trend = x, where K is the (T-2) x T second
+difference matrix. The matrix is pentadiagonal and depends only on T and lamb, so its banded Cholesky factor is
+computed once for each (T, lamb) and reused for every series of that length. The columns of a DataFrame are solved
+together as the columns of one right-hand side; detrend.detrend groups Series with the same dates into DataFrames.
+The results equal those of statsmodels' hpfilter, which fredpy's hp_filter method uses.'''
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import cholesky_banded, cho_solve_banded
+
+# Banded Cholesky factors by (T, lamb)
+_factors = {}
+
+
+def hp_factor(T,lamb):
+
+    '''Returns the upper banded Cholesky factor of I + lamb*K'K for series with T observations'''
+
+    if (T,lamb) not in _factors:
+
+        # Diagonals of K'K from the second difference weights (1,-2,1) in each row of K
+        weights = np.array([1.,-2.,1.])
+        rows = np.arange(T-2)
+        diagonals = [np.zeros(T-k) for k in range(3)]
+        for k in range(3):
+            for a in range(3-k):
+                np.add.at(diagonals[k],rows+a,weights[a]*weights[a+k])
+
+        # Upper banded storage: row 2 is the main diagonal and rows 1 and 0 are the super diagonals
+        ab = np.zeros((3,T))
+        ab[2] = 1+lamb*diagonals[0]
+        ab[1,1:] = lamb*diagonals[1]
+        ab[0,2:] = lamb*diagonals[2]
+
+        _factors[(T,lamb)] = cholesky_banded(ab)
+
+    return _factors[(T,lamb)]
+
+
+def hp_filter(df,lamb=1600):
+
+    '''Returns DataFrames of the cyclical and trend components of each column of df. The columns must be complete
+    (no missing values) over the index of df.'''
+
+    values = np.asarray(df,dtype=float)
+    trend = cho_solve_banded((hp_factor(len(values),lamb),False),values)
+
+    trend = pd.DataFrame(trend,index=df.index,columns=df.columns)
+
+    return df-trend, trend
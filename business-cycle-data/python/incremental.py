@@ -0,0 +1,169 @@
+'''Incremental updates of the business cycle data.
+
+A full build calibrates the capital stock parameters and the initial capital stock. A build stores the series it
+used, the calibration, the capital stock, and the filtered components with save_build. The next build keeps the
+stored calibration, compares the new series with the stored ones, and gives the same results as a full build with
+that calibration:
+
+    * The capital recursion continues from the stored capital stock at the first date where investment changed. The
+      capital stock is computed in full if the calibration or the first date of investment differs from the stored
+      one.
+    * Only the series whose values changed, including revisions and new dates, are filtered again. The stored trend
+      and cycle of the other series are reused.
+    * The one-sided HP and Hamilton filters are extended from their stored states by the new dates of series that
+      are otherwise unchanged. Series with revisions are filtered again.'''
+
+import os
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+import detrend
+
+
+def load_build(path):
+
+    '''Returns the build stored in path or None if there is none'''
+
+    if not os.path.exists(path):
+        return None
+
+    return pd.read_pickle(path)
+
+
+def save_build(path,build):
+
+    '''Stores the dictionary build in path'''
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)),exist_ok=True)
+    pd.to_pickle(build,path)
+
+
+def first_change(new,old):
+
+    '''Returns the first date at which the Series new and old differ, including dates in only one of them, or None
+    if they are equal'''
+
+    new, old = new.align(old)
+    differ = ~((new==old)|(new.isna()&old.isna()))
+
+    if not differ.any():
+        return None
+
+    return differ.idxmax()
+
+
+def changes(series,stored):
+
+    '''Returns a dictionary mapping the name of each Series in the dictionary series to its first date of change from
+    the Series of the same name in the dictionary stored. The date is None for unchanged Series and the first date of
+    the Series for Series not in stored.'''
+
+    changed = {}
+    for name, s in series.items():
+        if stored is None or name not in stored:
+            changed[name] = s.index[0]
+        else:
+            changed[name] = first_change(s,stored[name])
+
+    return changed
+
+
+def capital_series(investment,delta,k0):
+
+    '''Returns the capital Series k[t+1] = i[t] + (1-delta)*k[t] with k[0] = k0 for the Series investment'''
+
+    x = np.concatenate([[k0],np.asarray(investment,dtype=float)[:-1]])
+
+    return pd.Series(lfilter([1],[1,-(1-delta)],x),index=investment.index)
+
+
+def extend_capital(investment,delta,capital,start):
+
+    '''Returns the capital Series for investment, reusing the stored Series capital through start, the first date at
+    which investment changed, or None if it is unchanged. Capital at start depends only on investment before start,
+    so the recursion continues from there.'''
+
+    p = len(investment) if start is None else investment.index.searchsorted(start)
+
+    if p >= len(investment):
+        return capital.reindex(investment.index)
+
+    # New dates are not in the stored Series, so continue from its last date at the latest
+    p = min(p,len(capital)-1)
+
+    return pd.concat([capital.iloc[:p],capital_series(investment.iloc[p:],delta,capital.iloc[p])])
+
+
+def update_capital(investment,calibration,build,start):
+
+    '''Returns the capital Series k[t+1] = i[t] + (1-delta)*k[t] with k[0] = calibration['k0'] for the Series
+    investment, where delta is calibration['delta']. The capital Series of build is extended from start, the first
+    date at which investment changed, if build was made with the same calibration and initial date. Otherwise the
+    Series is computed in full.'''
+
+    if build is None or build['calibration'] != calibration or build['capital'].index[0] != investment.index[0]:
+        return capital_series(investment,calibration['delta'],calibration['k0'])
+
+    return extend_capital(investment,calibration['delta'],build['capital'],start)
+
+
+def update_filter(series,build,method='hp',**parameters):
+
+    '''Returns DataFrames of the cyclical and trend components of the Series in the dictionary series and the list of
+    names of the Series that were filtered. Series that equal the Series stored in build['filtered'] are not filtered
+    again. Every Series is filtered if build is None or was made with a different filter. See detrend.detrend.'''
+
+    if build is None or build['filter'] != (method,parameters):
+        changed = list(series)
+    else:
+        changed = [name for name, start in changes(series,build['filtered']).items() if start is not None]
+
+    cycles = []
+    trends = []
+
+    if changed:
+        cycle, trend = detrend.detrend({name:series[name] for name in changed},method,**parameters)
+        cycles.append(cycle)
+        trends.append(trend)
+
+    unchanged = [name for name in series if name not in changed]
+    if unchanged:
+        cycles.append(build['cycle'][unchanged])
+        trends.append(build['trend'][unchanged])
+
+    return pd.concat(cycles,axis=1)[list(series)], pd.concat(trends,axis=1)[list(series)], changed
+
+
+def update_states(series,filtered,states,method,**parameters):
+
+    '''Returns DataFrames of the cyclical and trend components of the Series in the dictionary series computed with
+    the one-sided HP (method='hp_one_sided') or Hamilton (method='hamilton') filter, and the list of filter states to
+    store with the build. filtered is the dictionary of Series and states the list of states of the last build (None
+    if there is none). A group of Series with the same dates that was filtered with the same parameters is extended
+    with detrend.update by the dates after the stored ones if the Series are unchanged through the last stored date.
+    Other groups are filtered in full with detrend.start.'''
+
+    changed = changes(series,filtered)
+    stored = {tuple(state['trend'].columns):state for state in states or [] if state['parameters'] == parameters}
+
+    cycles = []
+    trends = []
+    new_states = []
+
+    for group in detrend.groups(series):
+        state = stored.get(tuple(group.columns))
+
+        if state is None or state['trend'].index[0] != group.index[0] or any(
+                changed[name] is not None and changed[name] <= state['trend'].index[-1] for name in group.columns):
+            state = detrend.start(group,method,**parameters)
+            state['parameters'] = parameters
+
+        else:
+            for date, values in group.loc[group.index > state['trend'].index[-1]].iterrows():
+                detrend.update(state,date,values)
+
+        cycles.append(state['cycle'])
+        trends.append(state['trend'])
+        new_states.append(state)
+
+    return pd.concat(cycles,axis=1)[list(series)], pd.concat(trends,axis=1)[list(series)], new_states
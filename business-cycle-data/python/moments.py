@@ -0,0 +1,145 @@
+'''Second moments of the business cycle data.
+
+table computes, for the cyclical component of every series, the standard deviation, the standard deviation relative
+to that of a reference series (GDP), the autocorrelations at lags 1 through k, and the correlations of the series k
+quarters before through k quarters after the reference series. Every moment is a function of sums of the cycles, their
+squares, and their lagged products over a window of dates, so sums computes cumulative sums of these once and the
+moments for any subsample (e.g. before and after 1984) follow from differences of the cumulative sums without another
+pass over the data.
+
+read loads the cycles from business_cycle_data_actual_trend_cycle.csv, or another file with columns ending in
+_cycle, and keeps their cumulative sums in memory so that later calls for other subsamples reuse them.'''
+
+import os
+import numpy as np
+import pandas as pd
+
+# Cumulative sums of files read with read by (path, modification time, reference, k)
+_cached = {}
+
+
+def _cumsum(values):
+
+    '''Returns the cumulative sums of values along the time axis (axis -2) with a row of zeros first, so the sum over
+    positions lo through hi is c[..., hi+1, :]-c[..., lo, :]'''
+
+    c = np.cumsum(values,axis=-2)
+
+    return np.concatenate([np.zeros(c.shape[:-2]+(1,)+c.shape[-1:]),c],axis=-2)
+
+
+def _lagged(values,lags):
+
+    '''Returns an array with shape (len(lags), T, columns) of values[t-j] for each lag j in lags, with zeros where
+    t-j is outside the data'''
+
+    T = len(values)
+    width = np.max(np.abs(lags))
+    padded = np.concatenate([np.zeros((width,)+values.shape[1:]),values,np.zeros((width,)+values.shape[1:])])
+
+    return padded[np.arange(T)[None,:]-np.asarray(lags)[:,None]+width]
+
+
+def sums(cycle,reference='gdp',k=4):
+
+    '''Returns a dictionary of the cumulative sums needed by table for the DataFrame cycle, whose columns are complete
+    over its index. reference is the column that the other columns are compared with and k is the largest lag.'''
+
+    x = np.asarray(cycle,dtype=float)
+    y = x[:,[list(cycle.columns).index(reference)]]
+
+    leads_lags = np.arange(-k,k+1)
+    lags = np.arange(1,k+1)
+
+    return {
+        'index':cycle.index,
+        'columns':cycle.columns,
+        'reference':reference,
+        'k':k,
+        'x':_cumsum(x),
+        'xx':_cumsum(x**2),
+        'y':_cumsum(y),
+        'yy':_cumsum(y**2),
+        'xy':_cumsum(x[None]*_lagged(y,leads_lags)),
+        'auto':_cumsum(x[None]*_lagged(x,lags))
+    }
+
+
+def _window(c,lo,hi):
+
+    '''Returns the sums over positions lo through hi (arrays, one per lag) from the cumulative sums c'''
+
+    if c.ndim == 3:
+        lags = np.arange(len(c))
+        return c[lags,hi+1]-c[lags,lo]
+
+    return c[hi+1]-c[lo]
+
+
+def _correlation(n,sx,sxx,sy,syy,sxy):
+
+    return (n*sxy-sx*sy)/np.sqrt((n*sxx-sx**2)*(n*syy-sy**2))
+
+
+def table(sums,start=None,end=None):
+
+    '''Returns a DataFrame of moments with one row per series for the dates from start through end (the whole
+    sample if None) computed from the dictionary returned by sums. The columns are:
+
+        std          Standard deviation
+        relative std Standard deviation divided by the standard deviation of the reference series
+        autocorr j   Correlation of x[t] and x[t-j] for j = 1, ..., k
+        corr j       Correlation of x[t+j] and the reference series at t for j = -k, ..., k
+
+    Each correlation uses the pairs of dates within the window.'''
+
+    index = sums['index']
+    k = sums['k']
+    a = 0 if start is None else index.searchsorted(pd.to_datetime(start))
+    b = len(index)-1 if end is None else index.searchsorted(pd.to_datetime(end),side='right')-1
+
+    # Standard deviations
+    n = b-a+1
+    sx = _window(sums['x'],a,b)
+    sxx = _window(sums['xx'],a,b)
+    std = np.sqrt((sxx-sx**2/n)/(n-1))
+    std_y = np.sqrt((_window(sums['yy'],a,b)-_window(sums['y'],a,b)**2/n)/(n-1))
+
+    # The pairs x[t], z[t-j] are for t from a+max(j,0) through b+min(j,0)
+    def correlations(lags,sz,szz,sxz):
+        lo = a+np.maximum(lags,0)
+        hi = b+np.minimum(lags,0)
+        return _correlation((hi-lo+1)[:,None],_window(sums['x'],lo,hi),_window(sums['xx'],lo,hi),
+                            _window(sz,lo-lags,hi-lags),_window(szz,lo-lags,hi-lags),_window(sxz,lo,hi))
+
+    lags = np.arange(1,k+1)
+    leads_lags = np.arange(-k,k+1)
+    auto = correlations(lags,sums['x'],sums['xx'],sums['auto'])
+
+    # The pair x[t+j], y[t] is the pair x[t], y[t-j]
+    cross = correlations(leads_lags,sums['y'],sums['yy'],sums['xy'])
+
+    moments = pd.DataFrame({'std':std,'relative std':std/std_y},index=sums['columns'])
+    for j, values in zip(lags,auto):
+        moments['autocorr '+str(j)] = values
+    for j, values in zip(leads_lags,cross):
+        moments['corr '+str(j)] = values
+
+    return moments
+
+
+def read(path,reference='gdp',k=4,start=None,end=None):
+
+    '''Returns the table of moments for the columns of the csv file in path with names ending in _cycle, for the
+    dates from start through end. Dates with missing values are dropped. The cumulative sums are kept for later calls
+    with the same file.'''
+
+    key = (os.path.abspath(path),os.path.getmtime(path),reference,k)
+
+    if key not in _cached:
+        data = pd.read_csv(path,index_col=0,parse_dates=True)
+        cycle = data[[column for column in data.columns if column.endswith('_cycle')]].dropna()
+        cycle.columns = [column[:-len('_cycle')] for column in cycle.columns]
+        _cached[key] = sums(cycle,reference=reference,k=k)
+
+    return table(_cached[key],start=start,end=end)
@@ -4,15 +4,18 @@
 # In[1]:
 
 
-from urllib.request import urlopen
 from bs4 import BeautifulSoup
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import os
+import os,sys
 plt.style.use('classic')
 plt.rcParams['figure.facecolor'] = 'white'
 
+# Shared download cache
+sys.path.append('../../shared/python')
+import http_cache
+
 
 # In[2]:
 
@@ -37,7 +40,8 @@ pwt_excel_url = 'https://dataverse.nl/api/access/datafile/354095'
 
 
 # Get HTML for PWT homepage
-html = urlopen("https://www.rug.nl/ggdc/productivity/pwt/?lang=en").read()
+with open(http_cache.fetch("https://www.rug.nl/ggdc/productivity/pwt/?lang=en"),'rb') as f:
+    html = f.read()
 
 # Parse HTML
 soup = BeautifulSoup(html, 'html.parser')
@@ -73,9 +77,10 @@ if os.path.exists('../xslx/'+current_pwt_file):
     pwt = pd.read_excel('../xslx/'+current_pwt_file,sheet_name='Data',index_col=3,parse_dates=True)
 
 else:
-    info = pd.read_excel(pwt_excel_url,sheet_name='Info',header=None)
-    legend = pd.read_excel(pwt_excel_url,sheet_name='Legend',index_col=0)
-    pwt = pd.read_excel(pwt_excel_url,sheet_name='Data',index_col=3,parse_dates=True)
+    pwt_excel_file = http_cache.fetch(pwt_excel_url)
+    info = pd.read_excel(pwt_excel_file,sheet_name='Info',header=None)
+    legend = pd.read_excel(pwt_excel_file,sheet_name='Legend',index_col=0)
+    pwt = pd.read_excel(pwt_excel_file,sheet_name='Data',index_col=3,parse_dates=True)
 
 
 # In[6]:
@@ -16,7 +16,7 @@ import statsmodels as sm
 import fredpy as fp
 import numpy as np
 import pandas as pd
-import os,urllib
+import os,sys
 import matplotlib.pyplot as plt
 plt.style.use('classic')
 plt.rcParams['figure.facecolor'] = 'white'
@@ -24,6 +24,11 @@ plt.rcParams['figure.facecolor'] = 'white'
 import warnings
 warnings.filterwarnings('ignore')
 
+# Shared download cache
+sys.path.append('../../shared/python')
+import http_cache
+import splice
+
 # You must change XPATH if you are running this script from anywhere other than the directory containing x13as.
 XPATH = os.getcwd()
 
@@ -104,10 +109,13 @@ unemp_4 = unemp_4.window(['01-01-1948','01-01-2200']).data
 # In[6]:
 
 
-# Concatenate the first three series
-unemployment_rate_series = pd.concat([unemp_1,unemp_2]).sort_index()
-unemployment_rate_series = pd.concat([unemployment_rate_series,unemp_3]).sort_index()
-unemployment_rate_series = pd.concat([unemployment_rate_series,unemp_4]).sort_index()
+# Concatenate the four series
+unemployment_rate_series = splice.splice([
+    {'series':unemp_1},
+    {'series':unemp_2},
+    {'series':unemp_3},
+    {'series':unemp_4}
+])
 
 # plot the series and save the figure
 fig = plt.figure()
@@ -163,12 +171,9 @@ else:
 # Import data from Regis Barnichon's site
 dls = 'https://sites.google.com/site/regisbarnichon/cv/HWI_index.txt?attredirects=0'
 try:
-    urllib.urlretrieve(dls, '../txt/HWI_index.txt')
+    http_cache.copy(dls, '../txt/HWI_index.txt')
 except:
-    try:
-        urllib.request.urlretrieve(dls, '../txt/HWI_index.txt')
-    except:
-        print('HWI_index.txt is no longer available at given URL')
+    print('HWI_index.txt is no longer available at given URL')
 
 vac_2 = pd.read_csv('../txt/HWI_index.txt',delimiter='\t',skiprows=6)
 vac_2.columns = ['Date','composite HWI']
@@ -180,11 +185,6 @@ for d in vac_2['Date']:
 
 vac_2 = pd.Series(vac_2['composite HWI'].values,index = pd.to_datetime(dates))
 
-# Compute a scaling factor to ensure that the January 1, 1960 values of the first vacancy series match 
-# the second.
-scaling = vac_1.loc['01-01-1960']/vac_2.loc['1960-01-01']
-vac_2 = scaling* vac_2
-
 
 # In[9]:
 
@@ -194,19 +194,18 @@ vac_2 = scaling* vac_2
 
 vac_3 = fp.series('JTSJOL').data
 
-# Compute a scaling factor to ensure that the December 1, 2000 values of the first vacancy series match 
-# the second.
-scaling = vac_2.loc['12-01-2000']/vac_3.loc['12-01-2000']
-vac_3 = scaling* vac_3
-
 
 # In[10]:
 
 
-# Truncate each series
-vac_1 = vac_1.loc[:'12-01-1959']
-vac_2 = vac_2.loc['01-01-1960':'12-01-2000']
-vac_3 = vac_3.loc['01-01-2001':]
+# Truncate each series. Scale the second series so that its January 1, 1960 value matches the first and the third
+# so that its December 1, 2000 value matches the scaled second series.
+vacancy_segments = [
+    {'series':vac_1,'end':'12-01-1959'},
+    {'series':vac_2,'start':'01-01-1960','end':'12-01-2000','ratio_at':'01-01-1960'},
+    {'series':vac_3,'start':'01-01-2001','ratio_at':'12-01-2000'}
+]
+vac_1, vac_2, vac_3 = splice.pieces(vacancy_segments)
 
 # Plot the three truncated and scaled series to verify that they line up
 fig = plt.figure()
@@ -222,8 +221,7 @@ ax.grid()
 
 
 # Create the vacancy series
-vacancy_series_unscaled = pd.concat([vac_1,vac_2]).sort_index()
-vacancy_series_unscaled = pd.concat([vacancy_series_unscaled,vac_3]).sort_index()
+vacancy_series_unscaled = splice.splice(vacancy_segments)
 
 # plot the series and save the figure
 fig = plt.figure()
@@ -264,12 +262,9 @@ dls = 'https://www.census.gov/population/estimates/nation/popclockest.txt'
 dls = 'https://www2.census.gov/programs-surveys/popest/tables/1900-1980/national/totals/popclockest.txt'
 
 try:
-    urllib.urlretrieve(dls, '../txt/popclockest.txt')
+    http_cache.copy(dls, '../txt/popclockest.txt')
 except:
-    try:
-        urllib.request.urlretrieve(dls, '../txt/popclockest.txt')
-    except:
-        print('popclockest.txt is no longer available at given URL')
+    print('popclockest.txt is no longer available at given URL')
 
 # Import data and edit file
 with open('../txt/popclockest.txt','r') as newfile:
@@ -306,10 +301,13 @@ lf_2 = lf_2.resample('M').mean().interpolate()
 # Set dates to begining of month instead of middle
 lf_2.index = lf_2.index + pd.offsets.MonthBegin(0)
 
-# Compute a scaling factor to ensure that the Jaunary 1, 1948 values of the first LF series match 
-# the second.
-scaling = lf_1.iloc[0]/lf_2[lf_2.index==pd.to_datetime('1948-01-01')].values[0]
-lf_2 = scaling*lf_2[(lf_2.index>=pd.to_datetime('1929-04-01')) & (lf_2.index<pd.to_datetime('1948-01-01'))]
+# Truncate the population series to April 1929 through December 1947 and scale it so that its January 1, 1948
+# value matches the first LF series
+labor_force_segments = [
+    {'series':lf_2,'start':'1929-04-01','end':'1947-12-01','ratio_at':'1948-01-01'},
+    {'series':lf_1}
+]
+lf_2, lf_1 = splice.pieces(labor_force_segments,anchor=1)
 
 
 # In[14]:
@@ -330,7 +328,7 @@ fig.tight_layout()
 
 
 # form the labor force series
-labor_force_series = pd.concat([lf_1,lf_2]).sort_index()
+labor_force_series = splice.splice(labor_force_segments,anchor=1)
 
 # plot the series and save the figure
 fig = plt.figure()
@@ -23,6 +23,11 @@ import fredpy as fp
 import matplotlib.pyplot as plt
 import mock
 from openpyxl.reader import excel
+import sys
+
+# Shared download cache
+sys.path.append('../../shared/python')
+import http_cache
 
 plt.style.use('classic')
 plt.rcParams['figure.facecolor'] = 'white'
@@ -50,7 +55,7 @@ plt.rcParams['figure.facecolor'] = 'white'
 
 
 with mock.patch.object(excel.ExcelReader, 'read_properties', lambda self: None):
-    data = pd.read_excel('https://www.philadelphiafed.org/-/media/FRBP/Assets/Surveys-And-Data/survey-of-professional-forecasters/data-files/files/Median_PGDP_Level.xlsx?sc_lang=en&hash=52CF485F367422E0E5C561071BD0D9CA', dtype={'YEAR': str, 'QUARTER': str},sheet_name='Median_Level')
+    data = pd.read_excel(http_cache.fetch('https://www.philadelphiafed.org/-/media/FRBP/Assets/Surveys-And-Data/survey-of-professional-forecasters/data-files/files/Median_PGDP_Level.xlsx?sc_lang=en&hash=52CF485F367422E0E5C561071BD0D9CA'), dtype={'YEAR': str, 'QUARTER': str},sheet_name='Median_Level')
 
 # Fill in missing values for PGDP6 column for 1969:1-3 and 1970:1
 data['PGDP6'] = data['PGDP6'].interpolate()
@@ -73,6 +73,8 @@
 # PA.NUS.FCRF    | Official exchange rate (LCU per US\\$)     |
 # FR.INR.LEND    | Lending interest rate (%)                  |
 # 
+# The data are obtained either through the World Bank API or, by setting `data_source = 'wdi csv'`, from the bulk download of all WDI indicators (`WDI_csv.zip`), which is read without extracting it and needs no further network access once cached.
+# 
 # For each country, I find the largest date range that contains consecutive non-NaN values for the required indicators, either the first three or all five. Then if there is at least 10 years of data available, I compute the required averages.
 # 
 # ## Further reading
@@ -95,13 +97,12 @@
 # Load modules
 import pandas as pd
 import numpy as np
-import wbdata
-import os
-import shutil
-import getpass
-import requests
-import zipfile
+import sys
 import matplotlib.pyplot as plt
+from quantity_theory_tools import get_data_frame, read_wdi_countries, read_wdi_data
+sys.path.append('../../shared/python')
+import http_cache
+import worldbank
 plt.style.use('classic')
 plt.rcParams['figure.facecolor'] = 'white'
 
@@ -127,27 +128,52 @@ indicators = {
     'FR.INR.LEND':'lending rate'
 }
 
+# Source of the data: 'api' for the World Bank API or 'wdi csv' for the bulk WDI download
+data_source = 'api'
+
+# Whether to discard the cached API responses and download the data again
+refresh_data = False
+
+# Location of the bulk WDI download
+wdi_url = 'http://databank.worldbank.org/data/download/WDI_csv.zip'
 
-# ## Import data using `wbdata`
+
+# ## Import data
+# 
+# From the World Bank API or, if `data_source` is `'wdi csv'`, by downloading all WDI indicators. API responses are downloaded concurrently and kept in the shared download cache, so repeated runs do not download them again unless `refresh_data` is `True`. The bulk download is kept in the cache for 30 days and the country and indicator files are read directly from the zip file.
 
 # In[2]:
 
 
-# Get all countries and regions available through WB API
-all_wb_countries = wbdata.get_countries()
+if data_source == 'api':
+
+    # Discard cached responses
+    if refresh_data:
+        worldbank.invalidate()
+
+    # Get all countries and regions available through WB API
+    all_wb_countries = worldbank.get_countries()
+
+    # Convert to a DataFrame with selected columns
+    countries_and_regions = pd.DataFrame()
+
+    for c in all_wb_countries:
+        countries_and_regions.loc[c['id'],'country name'] = c['name']
+        countries_and_regions.loc[c['id'],'income group'] = c['incomeLevel']['id']
 
-# Convert to a DataFrame with selected columns
-countries_and_regions = pd.DataFrame()
+    # Change income abbreviations to words
+    countries_and_regions = countries_and_regions.replace('HIC','high').replace('UMC','middle').replace('LMC','middle').replace('LIC','low')
 
-for c in all_wb_countries:
-    countries_and_regions.loc[c['id'],'country name'] = c['name']
-    countries_and_regions.loc[c['id'],'income group'] = c['incomeLevel']['id']
+    # Name the index
+    countries_and_regions.index.name = 'iso code'
 
-# Change income abbreviations to words
-countries_and_regions = countries_and_regions.replace('HIC','high').replace('UMC','middle').replace('LMC','middle').replace('LIC','low')
+else:
 
-# Name the index
-countries_and_regions.index.name = 'iso code'
+    # Download World Bank WDI data
+    wdi_file = http_cache.fetch(wdi_url,ttl=30*24*60*60)
+
+    # Load country data
+    countries_and_regions = read_wdi_countries(wdi_file)
 
 # # Print all countries and regions
 # with pd.option_context('display.max_rows', None, 'display.max_columns', None):  # more options can be specified also
@@ -182,7 +208,10 @@ len(countries)
 
 
 # Import data into a DataFrame
-df=wbdata.get_dataframe(indicators,country=list(countries.index),keep_levels=False)
+if data_source == 'api':
+    df = worldbank.get_dataframe(indicators,country=list(countries.index))
+else:
+    df = read_wdi_data(wdi_file,indicators,country_codes=countries.index)
 
 # Sort the index
 df = df.sort_index()
@@ -202,194 +231,19 @@ for col in df.columns:
         print()
 
 
-# ## Import data by downloading all WDI indicators
-# 
-# This section is only here in case wbpy becomes unusable. Downloads `WDI_csv.zip` and extracts in the current directory. The following files are extracted:
-# 
-# * `WDISeries.csv`
-# * `WDISeries-Time.csv`
-# * `WDIFootNote.csv`
-# * `WDIData.csv`
-# * `WDICountry.csv`
-# * `WDICountry-Series.csv`
-# 
-
-# In[5]:
-
-
-# # Download World Bank WDI data
-# url = "http://databank.worldbank.org/data/download/WDI_csv.zip"
-
-# file_name = "WDI_csv.zip"
-# u = requests.get(url)
-
-# with open(file_name, 'wb') as f:
-#     for chunk in u.iter_content(chunk_size=1024): 
-#         if chunk: # filter out keep-alive new chunks
-#             f.write(chunk)
-#             f.flush()
-# f.close()
-
-# fh = open('WDI_csv.zip', 'rb')
-# z = zipfile.ZipFile(fh)
-# z.extractall()
-
-# # Delete zip file from WDI after extracting
-# os.remove('WDI_csv.zip')
-
-
-# In[6]:
-
-
-# # Load country data
-# countries = pd.read_csv('WDICountry.csv')
-
-# # Series of only countries
-# countries = countries[~countries['Country Code'].isin(drop_list)]
-
-# # Set ISO codes as index
-# countries.index = countries['Country Code']
-# countries.index.name = 'iso code'
-
-# # Select only name and income group columns and rename
-# countries = countries[['Table Name','Income Group']]
-# countries.columns = ['country name','income group']
-
-# # Change income abbreviations to words
-# countries.loc[:,'income group'] = countries['income group'].str.replace('High income','high').copy()
-# countries.loc[:,'income group'] = countries['income group'].str.replace('Upper middle income','middle').copy()
-# countries.loc[:,'income group'] = countries['income group'].str.replace('Lower middle income','middle').copy()
-# countries.loc[:,'income group'] = countries['income group'].str.replace('Low income','low').copy()
-
-# # Identify which countries are in OECD
-# countries['oecd'] = 'no'
-# countries.loc[oecd_list,'oecd'] = 'yes'
-
-# # Load indicator data
-# df_raw = pd.read_csv('WDIData.csv')
-
-# # Drop regions
-# df_raw = df_raw[df_raw['Country Code'].isin(countries.index)]
-
-# # Drop country code and indicator name
-# df_raw= df_raw.drop(['Country Code','Indicator Name'],axis=1)
-
-# # Drop unnecessary indicators
-# df_raw = df_raw[df_raw['Indicator Code'].isin(indicators.keys())]
-
-# # Drop superfluous unnamed columns
-# columns_to_drop = []
-
-# for c in df_raw.columns:
-#     if 'unnamed' in c.lower():
-#         columns_to_drop.append(c)
-# df_raw = df_raw.drop(columns_to_drop,axis=1)
-
-# # Replace indicator codes with names
-# for key,value in indicators.items():
-    
-#     df_raw.loc[:,'Indicator Code'] = df_raw['Indicator Code'].str.replace(key,value,regex=False)
-
-# # Empty DataFrame with county, year multiindex
-# df = pd.DataFrame(index=pd.MultiIndex.from_product([df_raw['Country Name'].unique(),df_raw.columns[2:]],names=['country','date']))
-# df = df.sort_index()
-
-# # Iterate over rows of df_raw and fill values in df
-# for i in df_raw.index:
-#     for c in df_raw.columns[2:]:
-        
-#         df.loc[(df_raw.loc[i,'Country Name'],c),df_raw.loc[i,'Indicator Code']] = df_raw.loc[i,c]
-
-# # Reorder columns
-# df = df[['broad money','gdp deflator','real gdp','exchange rate','lending rate']]
-
-# # Remove WDI csv files
-# for file in os.listdir():
-#     if file.endswith('csv') or file.endswith('zip'):
-#         os.remove(file)
-
-
 # ## Construct data sets
 
-# In[7]:
-
-
-def get_limits(series):
-    
-    '''Function to extract longest run of non NaN values. Code adapted from: https://stackoverflow.com/a/41494706'''
-    
-    # Extract out relevant column from dataframe as array
-    values = series.values
-    
-    # Mask
-    mask = np.concatenate(( [True], np.isnan(values), [True] ))
-    
-    # Start-stop limits
-    limits = np.flatnonzero(mask[1:] != mask[:-1]).reshape(-1,2)
-    
-    # Get max interval, interval limits
-    start,stop = limits[(limits[:,1] - limits[:,0]).argmax()]
-    
-    return start,stop
+# In[5]:
 
 
-def get_data_frame(df,indicators,show_not_available=False):
-    
-    '''Produce a DataFrame with the desired indicators'''
-    
-    # Initialize DataFrame
-    data = pd.DataFrame()
-    
-    # Columns
-    new_columns = pd.Series(
-        ['money growth','inflation','gdp growth','exchange rate depreciation','nominal interest rate'],
-        index=['broad money','gdp deflator','real gdp','exchange rate','lending rate']
-    )
-    
-    
-    for n, value in enumerate(df.groupby(level=0)):
-        country, country_df = value
-        
-        try:
-            
-            column_sum = country_df[indicators].sum(axis=1,skipna=False)
-            start,stop = get_limits(column_sum)
-            
-            if stop-start>=10:
-                data.loc[n,'country'] = country
-                try:
-                    data.loc[n,'iso code'] = countries[countries['country name']==country].index[0]
-                except:
-                    print('Cannot find iso code for '+country)
-                data.loc[n,'observations'] = stop - start
-                
-                
-                for ind in indicators:
-                    
-                    if ind == 'lending rate':
-                        
-                        data.loc[n,new_columns[ind]] = np.mean(country_df[ind].iloc[start:stop])/100
-
-                    else:    
-                        data.loc[n,new_columns[ind]] = (country_df[ind].iloc[stop-1]/country_df[ind].iloc[start])**(1/(stop-start-1))-1
-            
-                data.loc[n,'income group'] = countries[countries['country name']==country]['income group'].iloc[0]
-                data.loc[n,'oecd'] = countries[countries['country name']==country]['oecd'].iloc[0]
-        except:
-            if show_not_available==True:
-                print('Data not available for: ',country)
-            
-
-    return data
-
 # Closed economy data
-quantity_theory_data = get_data_frame(df,indicators = ['broad money','gdp deflator','real gdp'],show_not_available=False)
+quantity_theory_data = get_data_frame(df,['broad money','gdp deflator','real gdp'],countries,show_not_available=False)
 
 # Export closed economy data
 quantity_theory_data.to_csv('../csv/quantity_theory_data.csv',index=False)
 
 # Open economy data
-quantity_theory_data_open = get_data_frame(df,indicators = ['broad money','gdp deflator','real gdp','lending rate','exchange rate'],show_not_available=False)
+quantity_theory_data_open = get_data_frame(df,['broad money','gdp deflator','real gdp','lending rate','exchange rate'],countries,show_not_available=False)
 
 # Export open economy data
 quantity_theory_data_open.to_csv('../csv/quantity_theory_data_open.csv',index=False)
@@ -397,7 +251,7 @@ quantity_theory_data_open.to_csv('../csv/quantity_theory_data_open.csv',index=Fa
 
 # ## Figures
 
-# In[8]:
+# In[6]:
 
 
 # Figure for my website
@@ -431,7 +285,7 @@ ax.grid(linestyle=':')
 plt.savefig('../png/money_inflation_by_income.png',bbox_inches='tight',dpi=120)
 
 
-# In[9]:
+# In[7]:
 
 
 p = quantity_theory_data['inflation']
@@ -466,22 +320,10 @@ plt.tight_layout()
 
 # ## Save metadata
 
-# In[10]:
-
-
-data = wbdata.get_data('NY.GDP.MKTP.KD', country="USA")
-
-pd.Series({'first_date':data[-1]['date'],'last_date':data[0]['date']}).to_csv('../csv/quantity_theory_metadata.csv',index=False)
-
-
-# ## Delete cache
-
-# In[11]:
+# In[8]:
 
 
-# Get current user
-user = getpass.getuser()
+dates = df.loc[countries.loc['USA','country name']].index
 
-# Remove wbdata Cache
-shutil.rmtree('/Users/'+user+'/Library/Caches/wbdata')
+pd.Series({'first_date':dates[0],'last_date':dates[-1]}).to_csv('../csv/quantity_theory_metadata.csv',index=False)
 
@@ -0,0 +1,274 @@
+'''Functions for constructing the quantity theory data sets from a DataFrame of WDI indicators with a (country, date)
+MultiIndex. All countries are processed at once as 2-D (country x year) NumPy arrays. The DataFrame can come from
+the World Bank API or, without access to it, from the bulk WDI download read by read_wdi_data. get_data_frame
+constructs one data set and sweep constructs many for robustness checks.'''
+
+import os
+import zipfile
+import itertools
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Names of the averaged columns for each indicator
+new_columns = pd.Series(
+    ['money growth','inflation','gdp growth','exchange rate depreciation','nominal interest rate'],
+    index=['broad money','gdp deflator','real gdp','exchange rate','lending rate']
+)
+
+
+# Names of the data and country files in the bulk WDI download (older releases use the first name for the data file)
+wdi_data_files = ['WDIData.csv','WDICSV.csv']
+wdi_country_file = 'WDICountry.csv'
+
+# Income groups in the WDI country file
+income_groups = {
+    'High income':'high',
+    'Upper middle income':'middle',
+    'Lower middle income':'middle',
+    'Low income':'low'
+}
+
+
+@contextlib.contextmanager
+def open_wdi_file(source,names):
+
+    '''Opens the first of the files in names from source, which is either WDI_csv.zip or a directory with the files
+    extracted from it. Use in a with statement, which closes the file and the zip file.'''
+
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as z:
+            for name in z.namelist():
+                if name.split('/')[-1] in names:
+                    with z.open(name) as f:
+                        yield f
+                    return
+        raise FileNotFoundError('None of '+', '.join(names)+' found in '+str(source))
+
+    for name in names:
+        if os.path.exists(os.path.join(source,name)):
+            with open(os.path.join(source,name),'rb') as f:
+                yield f
+            return
+    raise FileNotFoundError('None of '+', '.join(names)+' found in '+str(source))
+
+
+def read_wdi_countries(source):
+
+    '''Returns a DataFrame indexed by ISO code with the country name and income group of each country and region in
+    the bulk WDI download'''
+
+    with open_wdi_file(source,[wdi_country_file]) as f:
+        countries = pd.read_csv(f,usecols=['Country Code','Table Name','Income Group'],index_col='Country Code')
+
+    countries.index.name = 'iso code'
+    countries.columns = ['country name','income group']
+    countries['income group'] = countries['income group'].replace(income_groups)
+
+    return countries
+
+
+def read_wdi_data(source,indicators,country_codes=None,chunksize=50000):
+
+    '''Returns a DataFrame of the WDI indicators in the bulk WDI download with a (country, date) MultiIndex, like
+    wbdata.get_dataframe with keep_levels=False. indicators is a dictionary mapping WDI IDs to column names. The data
+    file is read in chunks of chunksize rows and only the rows for the requested indicators (and countries, if
+    country_codes is given) are kept.'''
+
+    def keep_column(column):
+        return column not in ['Indicator Name'] and not column.startswith('Unnamed')
+
+    rows = []
+    with open_wdi_file(source,wdi_data_files) as f:
+        for chunk in pd.read_csv(f,usecols=keep_column,chunksize=chunksize):
+            selected = chunk['Indicator Code'].isin(indicators.keys())
+            if country_codes is not None:
+                selected &= chunk['Country Code'].isin(country_codes)
+            rows.append(chunk[selected])
+
+    raw = pd.concat(rows).drop('Country Code',axis=1)
+
+    # Years in columns to one row per (country, indicator, year), then indicators to columns
+    df = raw.melt(id_vars=['Country Name','Indicator Code'],var_name='date')
+    df = df.pivot(index=['Country Name','date'],columns='Indicator Code',values='value')
+
+    df = df.reindex(columns=list(indicators.keys())).rename(columns=indicators)
+    df.index.names = ['country','date']
+    df.columns.name = None
+
+    return df.sort_index()
+
+
+def get_panel(df,indicators):
+
+    '''Returns the country names, the years, and a 3-D array (indicator x country x year) of the indicators in df'''
+
+    wide = [df[ind].unstack(level=1) for ind in indicators]
+    countries = wide[0].index
+    years = wide[0].columns
+
+    values = np.stack([w.reindex(index=countries,columns=years).to_numpy(dtype=float) for w in wide])
+
+    return countries, years, values
+
+
+def get_run_limits(valid):
+
+    '''For each row of the 2-D boolean array valid, returns the start and stop (exclusive) of the longest run of True
+    values. Ties go to the earliest run, as in https://stackoverflow.com/a/41494706. Rows without any True values have
+    start equal to stop.'''
+
+    positions = np.arange(valid.shape[1])
+
+    # Length of the run of True values ending at each position
+    last_false = np.maximum.accumulate(np.where(valid,-1,positions),axis=1)
+    run_length = np.where(valid,positions-last_false,0)
+
+    length = run_length.max(axis=1)
+    stop = np.where(length>0,run_length.argmax(axis=1)+1,0)
+
+    return stop-length, stop
+
+
+def get_averages(values,start,stop,indicators):
+
+    '''Returns a dictionary of arrays of the averages over [start, stop) for each row of each indicator in values.
+    Growth rates are geometric averages and the lending rate is an arithmetic average converted from percent.'''
+
+    rows = np.arange(values.shape[1])
+    observations = stop-start
+
+    averages = {}
+    for k, ind in enumerate(indicators):
+
+        if ind == 'lending rate':
+            cumulative = np.concatenate([np.zeros((len(rows),1)),np.nancumsum(values[k],axis=1)],axis=1)
+            averages[new_columns[ind]] = (cumulative[rows,stop]-cumulative[rows,start])/observations/100
+
+        else:
+            averages[new_columns[ind]] = (values[k,rows,stop-1]/values[k,rows,start])**(1/(observations-1))-1
+
+    return averages
+
+
+def get_windows(names,values,indicators,min_years):
+
+    '''Returns a DataFrame with the observations and averages of the indicators for each of the countries in names with
+    at least min_years consecutive years of observations of every indicator. values is the array of the indicators
+    returned by get_panel.'''
+
+    start, stop = get_run_limits(~np.isnan(values).any(axis=0))
+
+    available = stop-start>=min_years
+    names, values, start, stop = names[available], values[:,available], start[available], stop[available]
+
+    data = pd.DataFrame({'country':names,'observations':(stop-start).astype(float)})
+
+    return pd.concat([data,pd.DataFrame(get_averages(values,start,stop,indicators))],axis=1)
+
+
+def get_country_info(countries):
+
+    '''Returns the ISO code, income group, and OECD membership of each country in countries indexed by country name'''
+
+    return countries.reset_index().drop_duplicates('country name').set_index('country name')[['iso code','income group','oecd']]
+
+
+def get_data_frame(df,indicators,countries,show_not_available=False,min_years=10):
+
+    '''Produce a DataFrame with the desired indicators for each country with at least min_years consecutive years of
+    observations of every indicator. countries is a DataFrame indexed by ISO code with columns 'country name',
+    'income group', and 'oecd'.'''
+
+    names, years, values = get_panel(df,indicators)
+
+    if show_not_available==True:
+        for country in names[np.isnan(values).any(axis=0).all(axis=1)]:
+            print('Data not available for: ',country)
+
+    data = get_windows(names,values,indicators,min_years)
+
+    info = get_country_info(countries)
+
+    for country in data.loc[~data['country'].isin(info.index),'country']:
+        print('Cannot find iso code for '+country)
+
+    data.insert(1,'iso code',data['country'].map(info['iso code']))
+    data['income group'] = data['country'].map(info['income group'])
+    data['oecd'] = data['country'].map(info['oecd'])
+
+    return data
+
+
+# Panel shared with the processes started by sweep
+_panel = None
+
+
+def _sweep_windows(subset):
+
+    '''Returns get_windows for the indicators in subset from the shared panel'''
+
+    names, indicators, values, min_years = _panel
+    rows = [indicators.index(ind) for ind in subset]
+
+    return get_windows(names,values[rows],list(subset),min_years)
+
+
+def sweep(df,countries,indicator_sets,min_years=[10],income_groups=[None],processes=None):
+
+    '''Constructs the data set for every combination of a list of indicators in indicator_sets, a minimum number of
+    consecutive years in min_years, and an income group in income_groups (None for all countries). Returns a tidy
+    DataFrame with one row per combination, country, and average, with columns 'indicators', 'min years',
+    'income group', 'country', 'iso code', 'observations', 'variable', and 'value'.
+
+    The (indicator x country x year) array is built once from df and the longest windows and averages are computed
+    once for each list of indicators, in parallel on up to processes processes (the number of CPUs if None) where
+    processes can be forked. Each combination then only selects countries from those results.'''
+
+    global _panel
+
+    indicator_sets = [tuple(subset) for subset in indicator_sets]
+    subsets = list(dict.fromkeys(indicator_sets))
+    indicators = list(dict.fromkeys(ind for subset in subsets for ind in subset))
+
+    names, years, values = get_panel(df,indicators)
+    _panel = (names,indicators,values,max(min(min_years),2))
+
+    try:
+        if processes != 1 and len(subsets) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            with ProcessPoolExecutor(max_workers=processes,mp_context=multiprocessing.get_context('fork')) as pool:
+                windows = dict(zip(subsets,pool.map(_sweep_windows,subsets)))
+        else:
+            windows = {subset:_sweep_windows(subset) for subset in subsets}
+    finally:
+        _panel = None
+
+    info = get_country_info(countries)
+
+    # Each list of indicators in long form with the country information
+    tidy = {}
+    for subset, data in windows.items():
+        data = data.melt(id_vars=['country','observations'],var_name='variable')
+        data.insert(1,'iso code',data['country'].map(info['iso code']))
+        tidy[subset] = (data,data['country'].map(info['income group']).to_numpy())
+
+    results = []
+    labels = {'indicators':[],'min years':[],'income group':[]}
+    for subset, years, group in itertools.product(indicator_sets,min_years,income_groups):
+
+        data, data_groups = tidy[subset]
+        selected = data['observations'].to_numpy()>=years
+        if group is not None:
+            selected &= data_groups==group
+
+        results.append(data[selected])
+        for key, label in zip(labels,[', '.join(subset),years,'all' if group is None else group]):
+            labels[key].append(np.repeat(label,selected.sum()))
+
+    results = pd.concat(results,ignore_index=True)
+    for n, key in enumerate(labels):
+        results.insert(n,key,np.concatenate(labels[key]))
+
+    return results
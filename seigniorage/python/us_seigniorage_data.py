@@ -7,6 +7,9 @@
 import pandas as pd
 import fredpy as fp
 import numpy as np
+import sys
+sys.path.append('../../shared/python')
+import fred_batch
 
 
 # # US Seigniorage Data
@@ -40,8 +43,7 @@ import numpy as np
 
 
 # Download monetary base and GDP deflator data
-m_base = fp.series('BOGMBASE')
-gdp_deflator = fp.series('A191RD3A086NBEA')
+m_base, gdp_deflator = fred_batch.get(['BOGMBASE','A191RD3A086NBEA'])
 
 # Convert monetary base data to annual frequency
 m_base = m_base.as_frequency('A')
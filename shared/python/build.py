@@ -0,0 +1,288 @@
+'''Builds the data sets in this repository.
+
+Each target below declares the program that produces it, the local files that the program reads, and the files that
+it writes. A target depends on the targets that write its inputs. Targets whose dependencies are complete are run
+concurrently, each program in its own process started from its own directory. A target is skipped if its program, the
+local modules that the program imports (from its own directory or shared/python), and its inputs are unchanged since
+its last successful run and its outputs exist. Programs that download data have no local
+inputs, so use --force to rebuild them.
+
+Usage (from any directory):
+
+    python build.py [--jobs N] [--force] [--dry-run] [target ...]'''
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Root directory of the repository
+root = os.path.abspath(os.path.join(os.path.dirname(__file__),'..','..'))
+
+# Directories of the local modules that programs import, besides the directory of the program
+module_dirs = [os.path.join(root,'shared','python')]
+
+# File recording the state of the inputs of each target at its last successful run
+state_file = os.path.join(root,'.build_state.json')
+
+# Target declarations. Paths are relative to the repository root.
+targets = {
+    'business-cycle': {
+        'program':'business-cycle-data/python/business_cycle_data.ipynb',
+        'inputs':[],
+        'outputs':['business-cycle-data/csv/rbc_data_actual_trend.csv',
+                   'business-cycle-data/csv/rbc_data_actual_trend_cycle.csv',
+                   'business-cycle-data/csv/business_cycle_data_actual_trend.csv',
+                   'business-cycle-data/csv/business_cycle_data_actual_trend_cycle.csv',
+                   'business-cycle-data/csv/business_cycle_data_filter_cycles.csv',
+                   'business-cycle-data/csv/business_cycle_data_moments.csv',
+                   'business-cycle-data/csv/business_cycle_metadata.csv']
+    },
+    'cross-country-production': {
+        'program':'cross-country-production/python/cross_country_production_data.py',
+        'inputs':[],
+        'outputs':['cross-country-production/csv/cross_country_production.csv',
+                   'cross-country-production/csv/cross_country_gdp_per_capita.csv',
+                   'cross-country-production/csv/pwt_metadata.csv',
+                   'cross-country-production/png/fig_GDP_GDP_Growth_site.png']
+    },
+    'dmp': {
+        'program':'dmp/python/us_beveridge_curve_data.py',
+        'inputs':['dmp/txt/unemployment_1947.txt',
+                  'dmp/txt/vacancies_1929-1960.txt'],
+        'outputs':['dmp/csv/beveridge_curve_data.csv',
+                   'dmp/png/fig_beveridge_curve.png']
+    },
+    'inflation-forecasts': {
+        'program':'inflation-forecasts-and-interest-rates/python/inflation_forecast_data.py',
+        'inputs':[],
+        'outputs':['inflation-forecasts-and-interest-rates/csv/real_rate_data_quarterly.csv',
+                   'inflation-forecasts-and-interest-rates/csv/real_rate_data_annual.csv']
+    },
+    'quantity-theory': {
+        'program':'quantity-theory/python/quantity_theory_data.py',
+        'inputs':[],
+        'outputs':['quantity-theory/csv/quantity_theory_data.csv',
+                   'quantity-theory/csv/quantity_theory_data_open.csv',
+                   'quantity-theory/csv/quantity_theory_metadata.csv']
+    },
+    'seigniorage': {
+        'program':'seigniorage/python/us_seigniorage_data.py',
+        'inputs':[],
+        'outputs':['seigniorage/csv/us_seigniorage_data.csv']
+    },
+    'state-income': {
+        'program':'us-convergence/python/state_income_data.py',
+        'inputs':['us-convergence/historic_data/Historical Statistics of the US - Easterlin State Income Data.csv',
+                  'us-convergence/historic_data/Historical Statistics of the US - cpi.csv'],
+        'outputs':['us-convergence/csv/state_income_data.csv',
+                   'us-convergence/csv/state_income_metadata.csv']
+    },
+    'us-convergence-map': {
+        'program':'us-convergence/python/us_convergence_map.py',
+        'inputs':['us-convergence/csv/state_income_data.csv',
+                  'us-convergence/svg/us_map.svg'],
+        'outputs':['us-convergence/png/fig_us_statesIncome.png',
+                   'us-convergence/png/fig_us_statesIncomeGrowth.png',
+                   'us-convergence/png/fig_us_statesIncomeRelative.png']
+    },
+    'us-production': {
+        'program':'us-production/python/us_production_data.py',
+        'inputs':[],
+        'outputs':['us-production/csv/US_Production_A_Data.csv',
+                   'us-production/csv/US_Production_Q_Data.csv',
+                   'us-production/csv/US_Production_A_Data_Growth_Rates.csv',
+                   'us-production/csv/US_Production_Q_Data_Growth_Rates.csv']
+    },
+}
+
+
+def dependencies(targets):
+    '''Returns a dictionary mapping each target to the set of targets that write one of its inputs'''
+
+    writers = {}
+    for name, target in targets.items():
+        for output in target['outputs']:
+            writers[output] = name
+
+    return {name:{writers[i] for i in target['inputs'] if i in writers} for name, target in targets.items()}
+
+
+def file_hash(path):
+
+    sha256 = hashlib.sha256()
+    with open(os.path.join(root,path),'rb') as f:
+        for chunk in iter(lambda: f.read(1024*1024),b''):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def source(path):
+    '''Python source of the program or module in path. The code cells of a notebook are joined.'''
+
+    with open(os.path.join(root,path)) as f:
+        if not path.endswith('.ipynb'):
+            return f.read()
+        cells = json.load(f)['cells']
+
+    return '\n'.join(''.join(cell['source']) for cell in cells if cell['cell_type'] == 'code')
+
+
+def modules(program):
+    '''Returns the paths of the local modules that program imports, directly or through other local modules'''
+
+    pattern = re.compile(r'^\s*(?:from\s+([\w.]+)\s+import|import\s+([\w., ]+))',re.M)
+    dirs = [os.path.dirname(os.path.join(root,program))]+module_dirs
+
+    found = []
+    pending = [program]
+    while pending:
+        for match in pattern.finditer(source(pending.pop())):
+            names = [match.group(1)] if match.group(1) else match.group(2).split(',')
+            for name in names:
+                name = name.split(' as ')[0].strip().split('.')[0]
+                paths = [os.path.relpath(os.path.join(d,name+'.py'),root) for d in dirs]
+                path = next((p for p in paths if os.path.exists(os.path.join(root,p))),None)
+                if path is not None and path not in found:
+                    found.append(path)
+                    pending.append(path)
+
+    return sorted(found)
+
+
+def stamp(target):
+    '''Hashes of the program, the local modules it imports, and the inputs of target, or None if an input is
+    missing'''
+
+    paths = [target['program']]+modules(target['program'])+target['inputs']
+    if not all(os.path.exists(os.path.join(root,p)) for p in paths):
+        return None
+
+    return {p:file_hash(p) for p in paths}
+
+
+def command(program,output_dir):
+    '''Command that runs program from its own directory'''
+
+    if program.endswith('.ipynb'):
+        return ['jupyter','nbconvert','--to','notebook','--execute','--output-dir',output_dir,os.path.basename(program)]
+
+    return [sys.executable,os.path.basename(program)]
+
+
+def run(name,target):
+    '''Runs the program for target and returns its name, exit status, wall time, and captured output'''
+
+    start = time.time()
+    with tempfile.TemporaryDirectory() as output_dir:
+        result = subprocess.run(command(target['program'],output_dir),cwd=os.path.dirname(os.path.join(root,target['program'])),
+                                stdout=subprocess.PIPE,stderr=subprocess.STDOUT,text=True)
+
+    return name, result.returncode, time.time()-start, result.stdout
+
+
+def build(names=None,jobs=None,force=False,dry_run=False):
+    '''Builds the targets in names and everything they depend on (every target if names is None) and returns a
+    dictionary mapping each target to 'ran', 'skipped', 'failed', or 'blocked' (a dependency failed).'''
+
+    deps = dependencies(targets)
+
+    # Add the targets that the requested targets depend on
+    selected = set(targets if names is None else names)
+    pending = list(selected)
+    while pending:
+        for d in deps[pending.pop()]:
+            if d not in selected:
+                selected.add(d)
+                pending.append(d)
+
+    if os.path.exists(state_file):
+        with open(state_file) as f:
+            state = json.load(f)
+    else:
+        state = {}
+
+    status = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+
+        while len(status) < len(selected):
+
+            for name in sorted(selected):
+                if name in status or name in running.values() or not all(d in status for d in deps[name]):
+                    continue
+
+                target = targets[name]
+                if any(status[d] in ['failed','blocked'] for d in deps[name]):
+                    status[name] = 'blocked'
+                    print(name+': blocked by failed dependency')
+                    continue
+
+                # Inputs written by dependencies are hashed after those have run, so a dependency that reproduces
+                # identical files does not trigger a rebuild. In a dry run the dependencies have not actually run.
+                current = stamp(target)
+                upstream_ran = dry_run and any(status[d] == 'ran' for d in deps[name])
+                outputs_exist = all(os.path.exists(os.path.join(root,o)) for o in target['outputs'])
+                if not force and not upstream_ran and current is not None and state.get(name) == current and outputs_exist:
+                    status[name] = 'skipped'
+                    print(name+': up to date')
+                    continue
+
+                if dry_run:
+                    status[name] = 'ran'
+                    print(name+': would run '+target['program'])
+                    continue
+
+                print(name+': running '+target['program'])
+                running[pool.submit(run,name,target)] = name
+
+            if not running:
+                if len(status) < len(selected) and not any(all(d in status for d in deps[n]) for n in selected-set(status)):
+                    raise RuntimeError('circular dependency among targets: '+', '.join(sorted(selected-set(status))))
+                continue
+
+            done, _ = wait(list(running),return_when=FIRST_COMPLETED)
+            for future in done:
+                name, returncode, seconds, output = future.result()
+                del running[future]
+
+                if returncode == 0:
+                    status[name] = 'ran'
+                    state[name] = stamp(targets[name])
+                    print(name+': finished in '+str(round(seconds,1))+' s')
+                else:
+                    status[name] = 'failed'
+                    print(name+': failed with exit status '+str(returncode)+' after '+str(round(seconds,1))+' s')
+                    print(output[-2000:])
+
+    if not dry_run:
+        with open(state_file,'w') as f:
+            json.dump(state,f,indent=1)
+
+    return status
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Build the data sets in this repository.')
+    parser.add_argument('targets',nargs='*',help='targets to build (default: all of them): '+', '.join(targets))
+    parser.add_argument('--jobs','-j',type=int,default=None,help='number of programs to run at once')
+    parser.add_argument('--force','-f',action='store_true',help='run targets even if their inputs are unchanged')
+    parser.add_argument('--dry-run','-n',action='store_true',help='print what would run without running it')
+    args = parser.parse_args()
+
+    unknown = [name for name in args.targets if name not in targets]
+    if unknown:
+        parser.error('unknown targets: '+', '.join(unknown))
+
+    status = build(args.targets or None,jobs=args.jobs,force=args.force,dry_run=args.dry_run)
+
+    sys.exit(1 if any(s in ['failed','blocked'] for s in status.values()) else 0)
@@ -0,0 +1,205 @@
+'''Batch downloads of FRED series for the programs that use fredpy.
+
+fredpy downloads each series with four sequential requests when fp.series is called. prefetch downloads a whole list
+of series at once: IDs are deduplicated, series are downloaded concurrently over one pooled connection, and each
+series is stored on disk by vintage (observation date) in the shared download cache directory so that later runs on
+the same day, and runs for past vintages, need no requests at all. A series already stored for an earlier vintage
+is downloaded again only if FRED reports that it has been updated since. The series are also placed in fredpy's own
+session cache, so subsequent fp.series calls for the same IDs return copies without downloading anything.
+
+fp.api_key must be set before calling prefetch or get. Set ECONOMIC_DATA_OFFLINE=1 to use the most recent stored
+vintage of each series without network access.'''
+
+import os
+import json
+import time
+import datetime
+import tempfile
+import requests
+import numpy as np
+import pandas as pd
+import fredpy as fp
+from concurrent.futures import ThreadPoolExecutor
+import http_cache
+
+# Base URL of the FRED API
+api_url = 'https://api.stlouisfed.org/'
+
+# Directory of the stored series
+cache_dir = os.path.join(http_cache.cache_dir,'fred')
+
+# Number of series downloaded at once
+max_workers = 8
+
+# Attributes of fredpy series objects other than data
+attributes = ['date_range','frequency','frequency_short','last_updated','notes','observation_date','release',
+              'seasonal_adjustment','seasonal_adjustment_short','series_id','source','t','title','units','units_short']
+
+# Observations per year by frequency, as in fredpy
+obs_per_year = {'D':365,'W':52,'M':12,'Q':4,'SA':2,'A':1}
+
+# One session for every request so that connections are reused
+_session = requests.Session()
+
+
+def _request(path,parameters):
+    '''Returns the decoded JSON response of the FRED API to path. Retries when the API is rate limited or
+    unavailable, like fredpy.'''
+
+    parameters = dict(parameters,api_key=fp.api_key,file_type='json')
+
+    for count in range(11):
+        r = _session.get(api_url+path,params=parameters,timeout=60)
+        if r.status_code == 200:
+            return r.json()
+        if r.status_code not in [429,500,504]:
+            r.raise_for_status()
+        time.sleep(5+count)
+
+    raise RuntimeError('FRED API error. Status code: '+str(r.status_code))
+
+
+def _download(series_id,observation_date,previous=None):
+    '''Returns the attributes and observations of a series as a dictionary that can be stored as JSON. previous is
+    the stored record of an earlier vintage, if any. If the series has not been updated since, previous is reused
+    with the new observation date and only one request is made.'''
+
+    vintage = {'series_id':series_id,'realtime_start':observation_date,'realtime_end':observation_date}
+
+    formatted_date = datetime.datetime.strptime(observation_date,'%Y-%m-%d').strftime('%B %d, %Y')
+
+    info = _request('fred/series',vintage)['seriess'][0]
+
+    if previous is not None and previous['last_updated'] == info['last_updated']:
+        return dict(previous,observation_date=formatted_date)
+
+    observations = _request('fred/series/observations',vintage)['observations']
+    release = _request('fred/series/release',vintage)['releases'][0]
+    source = _request('fred/release/sources',{'series_id':series_id,'release_id':release['id']})['sources'][0]
+
+    record = {key:info[key] for key in ['title','frequency','frequency_short','units','units_short',
+                                        'seasonal_adjustment','seasonal_adjustment_short','last_updated']}
+    record.update({
+        'series_id':series_id,
+        'notes':info.get('notes',''),
+        'observation_date':formatted_date,
+        't':obs_per_year.get(info['frequency_short'],np.nan),
+        'release':release['name'],
+        'source':source['name'],
+        'dates':[o['date'] for o in observations],
+        'values':[None if o['value'] == '.' else float(o['value']) for o in observations]
+    })
+
+    return record
+
+
+def _to_series(record):
+    '''Returns the fredpy series object for a record returned by _download'''
+
+    data = pd.Series(record['values'],index=pd.to_datetime(record['dates']),dtype=float)
+    data.index.name = 'date'
+    data.name = 'value'
+
+    # Infer the frequency of the index, as in fredpy
+    try:
+        data = data.asfreq(pd.infer_freq(data.index))
+    except (TypeError,ValueError):
+        pass
+
+    s = fp.series()
+    s.data = data
+    for key in attributes:
+        if key != 'date_range':
+            setattr(s,key,record[key])
+    s.date_range = 'Range: '+str(data.index[0])[:10]+' to '+str(data.index[-1])[:10]
+
+    return s
+
+
+def _memo_file(series_id,observation_date):
+
+    return os.path.join(cache_dir,observation_date,series_id.upper()+'.json')
+
+
+def _load(series_id,observation_date,earlier):
+    '''Returns the stored record of a series for a vintage, or the latest stored vintage before it if earlier'''
+
+    path = _memo_file(series_id,observation_date)
+
+    if earlier and not os.path.exists(path) and os.path.isdir(cache_dir):
+        vintages = [v for v in sorted(os.listdir(cache_dir)) if v <= observation_date
+                    and os.path.exists(_memo_file(series_id,v))]
+        if vintages:
+            path = _memo_file(series_id,vintages[-1])
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError,ValueError):
+        return None
+
+
+def _store(record,series_id,observation_date):
+
+    path = _memo_file(series_id,observation_date)
+    os.makedirs(os.path.dirname(path),exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd,'w') as f:
+        json.dump(record,f)
+    os.replace(tmp,path)
+
+
+def prefetch(series_ids,observation_date=None,workers=None,use_offline=None):
+    '''Downloads the FRED series in series_ids, observed at observation_date (today if None), and places them in
+    fredpy's session cache. Returns a dictionary mapping each distinct ID to its fredpy series.'''
+
+    if use_offline is None:
+        use_offline = http_cache.offline
+
+    if observation_date is None:
+        observation_date = datetime.datetime.today().strftime('%Y-%m-%d')
+    else:
+        observation_date = pd.to_datetime(observation_date).strftime('%Y-%m-%d')
+
+    # FRED IDs are not case sensitive
+    unique = list(dict.fromkeys(series_id.upper() for series_id in series_ids))
+
+    records = {series_id:_load(series_id,observation_date,use_offline) for series_id in unique}
+    missing = [series_id for series_id in unique if records[series_id] is None]
+
+    if missing and use_offline:
+        raise FileNotFoundError(', '.join(missing)+' not stored and offline mode is on')
+    if missing and fp.api_key is None:
+        raise ValueError('fredpy.api_key value not assigned. You need to provide your key for the FRED API.')
+
+    def download(series_id):
+        record = _download(series_id,observation_date,previous=_load(series_id,observation_date,True))
+        _store(record,series_id,observation_date)
+        return record
+
+    with ThreadPoolExecutor(max_workers=workers or max_workers) as pool:
+        records.update(zip(missing,pool.map(download,missing)))
+
+    series = {series_id:_to_series(records[series_id]) for series_id in unique}
+
+    for series_id in series_ids:
+        fp.series_cache[series_id+'_'+observation_date] = series[series_id.upper()]
+
+    return series
+
+
+def get(series_ids,observation_date=None,workers=None,use_offline=None):
+    '''Returns a list of fredpy series for the IDs in series_ids, in order. Repeated IDs are downloaded once and
+    returned as independent copies.'''
+
+    series = prefetch(series_ids,observation_date=observation_date,workers=workers,use_offline=use_offline)
+
+    copies = []
+    for series_id in series_ids:
+        copies.append(series[series_id.upper()].copy())
+
+        # fredpy's copy method leaves out the observation date
+        copies[-1].observation_date = series[series_id.upper()].observation_date
+
+    return copies
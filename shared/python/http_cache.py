@@ -0,0 +1,238 @@
+'''Shared download cache for the programs in this repository.
+
+Downloaded files are stored once by the SHA-256 hash of their contents in a cache directory that is shared by every
+program. A small metadata file for each URL records which content it returned, when, and with which ETag and
+Last-Modified headers. Fresh copies are served without any network access, stale copies are revalidated with a
+conditional request, and the least recently used files are evicted when the cache grows too large. Cached copies of
+particular URLs can be discarded with invalidate.
+
+The cache directory defaults to ~/.cache/economic-data and can be changed with the ECONOMIC_DATA_CACHE environment
+variable. Set ECONOMIC_DATA_OFFLINE=1 to never touch the network and use whatever copy is in the cache.'''
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import requests
+
+# Default location of the cache
+cache_dir = os.environ.get('ECONOMIC_DATA_CACHE',os.path.join(os.path.expanduser('~'),'.cache','economic-data'))
+
+# Whether to use cached copies only
+offline = os.environ.get('ECONOMIC_DATA_OFFLINE','') not in ['','0']
+
+# Number of seconds a downloaded file is used without revalidation
+default_ttl = 24*60*60
+
+# Maximum total size of the cached files in bytes
+max_bytes = 2*1024**3
+
+# One session for every download so that connections are reused
+_session = requests.Session()
+
+
+def _url_file(url,directory):
+    '''Path of the metadata file for url'''
+
+    return os.path.join(directory,'urls',hashlib.sha256(url.encode()).hexdigest()+'.json')
+
+
+def _blob_file(digest,directory):
+    '''Path of the cached file with SHA-256 hash digest'''
+
+    return os.path.join(directory,'blobs',digest)
+
+
+def _write_json(path,data):
+    '''Writes data to path atomically so that concurrent programs never read a partial file'''
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd,'w') as f:
+        json.dump(data,f)
+    os.replace(tmp,path)
+
+
+def _remove(path):
+    '''Removes path unless another program already has'''
+
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _read_json(path):
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError,ValueError):
+        return None
+
+
+def fetch(url,ttl=None,use_offline=None,directory=None,chunk_size=1024*1024,prune_cache=True):
+    '''Returns the path of a local copy of the file at url.
+
+    A cached copy that is younger than ttl seconds (default_ttl if None) is returned without a request. An older copy
+    is revalidated with If-None-Match and If-Modified-Since headers and is kept if the server answers 304 Not
+    Modified. If use_offline is True (the module setting offline if None), the cached copy is returned whatever
+    its age and an error is raised if there is none. If the server cannot be reached, a cached copy is used. The
+    cache is pruned after a download unless prune_cache is False, e.g. when the caller downloads many files at once
+    and prunes once afterwards.'''
+
+    if ttl is None:
+        ttl = default_ttl
+    if use_offline is None:
+        use_offline = offline
+    if directory is None:
+        directory = cache_dir
+
+    for sub in ['urls','blobs']:
+        os.makedirs(os.path.join(directory,sub),exist_ok=True)
+
+    meta_file = _url_file(url,directory)
+    meta = _read_json(meta_file)
+    if meta is not None and not os.path.exists(_blob_file(meta['sha256'],directory)):
+        meta = None
+
+    now = time.time()
+
+    if meta is not None and (use_offline or now-meta['fetched'] < ttl):
+        meta['accessed'] = now
+        _write_json(meta_file,meta)
+        return _blob_file(meta['sha256'],directory)
+
+    if use_offline:
+        raise FileNotFoundError(url+' is not in the cache and offline mode is on')
+
+    headers = {}
+    if meta is not None:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        response = _session.get(url,headers=headers,stream=True,timeout=60)
+    except requests.ConnectionError:
+        if meta is None:
+            raise
+        print('Could not reach '+url+'. Using cached copy.')
+        return _blob_file(meta['sha256'],directory)
+
+    with response:
+
+        if response.status_code == 304 and meta is not None:
+            meta['fetched'] = meta['accessed'] = now
+            _write_json(meta_file,meta)
+            return _blob_file(meta['sha256'],directory)
+
+        response.raise_for_status()
+
+        # Stream to a temporary file while hashing, then move into place under the content hash
+        sha256 = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=os.path.join(directory,'blobs'))
+        with os.fdopen(fd,'wb') as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                sha256.update(chunk)
+                f.write(chunk)
+
+        digest = sha256.hexdigest()
+        os.replace(tmp,_blob_file(digest,directory))
+
+        meta = {
+            'url':url,
+            'sha256':digest,
+            'size':os.path.getsize(_blob_file(digest,directory)),
+            'fetched':now,
+            'accessed':now,
+            'etag':response.headers.get('ETag'),
+            'last_modified':response.headers.get('Last-Modified')
+        }
+
+    _write_json(meta_file,meta)
+    if prune_cache:
+        prune(directory=directory)
+
+    return _blob_file(digest,directory)
+
+
+def prune(limit=None,max_age=None,directory=None):
+    '''Evicts cached files. Entries that have not been accessed for max_age seconds are removed, then the least
+    recently used files are removed until the total size is at most limit bytes (max_bytes if None).'''
+
+    if limit is None:
+        limit = max_bytes
+    if directory is None:
+        directory = cache_dir
+
+    url_dir = os.path.join(directory,'urls')
+    entries = []
+    for name in os.listdir(url_dir):
+        if name.startswith('tmp'):
+            continue
+        meta = _read_json(os.path.join(url_dir,name))
+        if meta is not None:
+            entries.append((os.path.join(url_dir,name),meta))
+
+    now = time.time()
+    if max_age is not None:
+        for path, meta in [(path,meta) for path, meta in entries if now-meta['accessed'] > max_age]:
+            _remove(path)
+            entries.remove((path,meta))
+
+    # A file is as recently used as the most recently used URL that points to it
+    last_used = {}
+    for path, meta in entries:
+        last_used[meta['sha256']] = max(last_used.get(meta['sha256'],0),meta['accessed'])
+
+    # Other programs may move temporary files into place or remove files while the directory is scanned
+    blobs = {}
+    for digest in os.listdir(os.path.join(directory,'blobs')):
+        try:
+            if digest in last_used:
+                blobs[digest] = os.path.getsize(_blob_file(digest,directory))
+            elif now-os.path.getmtime(_blob_file(digest,directory)) > 60*60:
+                # Unreferenced files and leftover temporary files
+                _remove(_blob_file(digest,directory))
+        except FileNotFoundError:
+            pass
+
+    total = sum(blobs.values())
+    for digest in sorted(blobs,key=lambda digest: last_used[digest]):
+        if total <= limit:
+            break
+        _remove(_blob_file(digest,directory))
+        total -= blobs[digest]
+        for path, meta in entries:
+            if meta['sha256'] == digest:
+                _remove(path)
+
+
+def invalidate(prefix,directory=None):
+    '''Discards the cached copies of every URL that begins with prefix so that the next fetch downloads them again.
+    Returns the number of URLs discarded.'''
+
+    if directory is None:
+        directory = cache_dir
+
+    url_dir = os.path.join(directory,'urls')
+    if not os.path.isdir(url_dir):
+        return 0
+
+    count = 0
+    for name in os.listdir(url_dir):
+        meta = _read_json(os.path.join(url_dir,name))
+        if meta is not None and meta['url'].startswith(prefix):
+            _remove(os.path.join(url_dir,name))
+            count += 1
+
+    return count
+
+
+def copy(url,file_name,**kwargs):
+    '''Writes a copy of the file at url to file_name through the cache. Keyword arguments are passed to fetch.'''
+
+    with open(fetch(url,**kwargs),'rb') as source, open(file_name,'wb') as f:
+        f.write(source.read())
@@ -0,0 +1,69 @@
+'''Splicing of series from several sources into one series.
+
+A chain is a list of segments in order of date. Each segment is a dictionary with the keys:
+
+    series     Pandas Series
+    start      First date of the segment in the spliced series (optional, the first date of series if absent)
+    end        Last date of the segment in the spliced series (optional, the last date of series if absent)
+    ratio_at   Date at which the segment is scaled to equal the neighbouring segment (optional)
+    mean_over  Pair of dates (start, end) of a window over which the segment is scaled so that its mean equals the
+               mean of the neighbouring segment (optional)
+
+The anchor segment is not scaled. A segment after the anchor is linked to the previous segment and a segment before
+the anchor to the next one, so scale factors compound along the chain. Links use the whole of each series, so a link
+date may be outside of the dates that a segment keeps. A segment without a link rule is not scaled.'''
+
+import pandas as pd
+
+
+def _date(date):
+
+    '''Returns date as a Timestamp, or None if date is None'''
+
+    return None if date is None else pd.to_datetime(date)
+
+
+def _scale(segment,neighbour):
+
+    '''Returns the scale factor that links segment to the scaled Series neighbour'''
+
+    series = segment['series']
+
+    if 'ratio_at' in segment:
+        date = _date(segment['ratio_at'])
+        return neighbour.loc[date]/series.loc[date]
+
+    if 'mean_over' in segment:
+        start, end = _date(segment['mean_over'][0]), _date(segment['mean_over'][1])
+        return neighbour.loc[start:end].mean()/series.loc[start:end].mean()
+
+    return 1
+
+
+def pieces(segments,anchor=0):
+
+    '''Returns a list of the scaled segments of a chain, each restricted to its start and end dates'''
+
+    scaled = [None]*len(segments)
+    scaled[anchor] = segments[anchor]['series']
+
+    for i in range(anchor+1,len(segments)):
+        scaled[i] = segments[i]['series']*_scale(segments[i],scaled[i-1])
+
+    for i in range(anchor-1,-1,-1):
+        scaled[i] = segments[i]['series']*_scale(segments[i],scaled[i+1])
+
+    return [s.loc[_date(segment.get('start')):_date(segment.get('end'))] for s, segment in zip(scaled,segments)]
+
+
+def splice(segments,anchor=0):
+
+    '''Returns the Series spliced from a chain of segments. Raises ValueError if the dates of two segments overlap.'''
+
+    spliced = pd.concat(pieces(segments,anchor=anchor))
+
+    if spliced.index.has_duplicates:
+        overlap = spliced.index[spliced.index.duplicated()].unique()
+        raise ValueError('Segments overlap on '+', '.join(str(date)[:10] for date in overlap))
+
+    return spliced.sort_index()
@@ -0,0 +1,84 @@
+'''Client for the World Bank Indicators API (https://datahelpdesk.worldbank.org/knowledgebase/topics/125589).
+
+Every page of every request is downloaded concurrently through the shared download cache in http_cache, so repeated
+runs reuse the cached responses until they are older than the cache's time to live. Call invalidate to discard the
+cached responses and download fresh data on the next request.
+
+get_countries and get_dataframe return the same data as the functions of the same names in wbdata.'''
+
+import json
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+import http_cache
+
+# Base URL of the API
+api_url = 'https://api.worldbank.org/v2/'
+
+# Number of records requested per page
+per_page = 20000
+
+# Number of pages downloaded at once
+max_workers = 8
+
+
+def _page(path,page,ttl):
+    '''Returns the metadata and records of one page of the response to path'''
+
+    url = api_url+path+'?format=json&per_page='+str(per_page)+'&page='+str(page)
+    with open(http_cache.fetch(url,ttl=ttl,prune_cache=False)) as f:
+        response = json.load(f)
+
+    # Errors are returned as a single message rather than metadata and records
+    if len(response) < 2:
+        http_cache.invalidate(url)
+        raise ValueError(path+': '+'; '.join(m.get('value','') for m in response[0].get('message',[])))
+
+    return response[0], response[1] or []
+
+
+def get_records(paths,ttl=None,workers=None):
+    '''Returns a dictionary mapping each API path in paths to the list of records of every page of its response. The
+    first pages of all paths are downloaded concurrently and then the remaining pages. The download cache is pruned
+    once after every page has been downloaded.'''
+
+    with ThreadPoolExecutor(max_workers=workers or max_workers) as pool:
+
+        first = list(pool.map(lambda path: _page(path,1,ttl),paths))
+        records = {path:list(r) for path, (meta, r) in zip(paths,first)}
+
+        rest = [(path,page) for path, (meta, r) in zip(paths,first) for page in range(2,int(meta['pages'])+1)]
+        for (path,page), (meta, r) in zip(rest,pool.map(lambda args: _page(*args,ttl),rest)):
+            records[path].extend(r)
+
+    http_cache.prune()
+
+    return records
+
+
+def get_countries(ttl=None):
+    '''Returns a list of the countries and regions in the API, each a dictionary with keys including 'id', 'name',
+    'region', and 'incomeLevel' '''
+
+    return get_records(['country'],ttl=ttl)['country']
+
+
+def get_dataframe(indicators,country=None,ttl=None,workers=None):
+    '''Returns a DataFrame of the indicators with a (country, date) MultiIndex. indicators is a dictionary mapping
+    indicator IDs to column names and country is a list of ISO codes (every country and region if None).'''
+
+    paths = ['country/all/indicator/'+ind for ind in indicators]
+    records = get_records(paths,ttl=ttl,workers=workers)
+
+    columns = []
+    for path, (ind, name) in zip(paths,indicators.items()):
+        rows = [r for r in records[path] if country is None or r['countryiso3code'] in country]
+        index = pd.MultiIndex.from_tuples([(r['country']['value'],r['date']) for r in rows],names=['country','date'])
+        columns.append(pd.Series([r['value'] for r in rows],index=index,name=name,dtype=float))
+
+    return pd.concat(columns,axis=1)
+
+
+def invalidate():
+    '''Discards every cached API response. Returns the number of responses discarded.'''
+
+    return http_cache.invalidate(api_url)
@@ -6,10 +6,14 @@
 
 import numpy as np
 from scipy.optimize import fsolve
+from scipy.signal import lfilter
 import matplotlib.dates as dts
 import fredpy as fp
 import pandas as pd
 import matplotlib.pyplot as plt
+import sys
+sys.path.append('../../shared/python')
+import fred_batch
 plt.style.use('classic')
 plt.rcParams['figure.facecolor'] = 'white'
 
@@ -41,14 +45,25 @@ N = 10
 # 1.3 If output_solow == TRUE, then Y = C + I.  Else: Y = C + I + G + NX (default)
 output_solow = False
 
-# 1.4 Define the function for computing the capital series
+# 1.4 Define the function for computing the capital series. k[t+1] = i[t] + (1-delta)*k[t] is a first-order
+#     recursive filter applied to k0 followed by investment, so the whole series is computed in one lfilter call.
 def capitalSeries(i,k0,delta):
-    t0 = len(i)-1
-    k = [k0]
-    for t in range(t0):
-        k.append(i.iloc[t]+(1-delta)*k[t])
+    x = np.concatenate([np.atleast_1d(k0),np.asarray(i,dtype=float)[:-1]])
 
-    return np.array(k)
+    return lfilter([1],[1,-(1-delta)],x)
+
+# 1.5 Define a function that transforms every column of a DataFrame of aligned series at once. The steps are applied
+#     in order: percentage change from growth periods earlier (like fredpy's apc), restriction to the dates in
+#     window, and rounding to decimals. Steps that are None are skipped.
+def transform(df,growth=None,window=None,decimals=None):
+    if growth is not None:
+        df = (100*(df/df.shift(growth)-1)).dropna(how='all')
+    if window is not None:
+        df = df.loc[window[0]:window[1]]
+    if decimals is not None:
+        df = df.round(decimals)
+
+    return df
 
 
 # In[4]:
@@ -56,6 +71,10 @@ def capitalSeries(i,k0,delta):
 
 # 2. Import and manage data from FRED
 
+# 2.0 Download every series used below at once. The fp.series calls are then answered from fredpy's cache.
+fred_batch.prefetch(['GPDIA','PCECA','GCEA','EXPGSA','IMPGSA','A019RC1A027NBEA','A191RD3A086NBEA','M1TTOTL1ES000',
+                     'GDPA','B4701C0A222NBEA','GPDI','PCEC','GCE','EXPGS','IMPGS','NETEXP','GDPDEF','GDP','HOANBS'])
+
 # 2.1 Annual data
 investmentA = fp.series('GPDIA')
 consumptionA = fp.series('PCECA')
@@ -165,17 +184,33 @@ def calibrate_initial_K_quarterly(k0Q):
     capitalQ = capitalSeries(investmentQ4.data,k0Q,delta/4)
     return capitalQ[0]/gdpQ.data.values[0] - np.mean(capitalQ[:N*4]/gdpQ.data.values[:N*4])
 
-# 4.2 Compute the calibrated initial values of capital
-k0A = fsolve(calibrate_initial_K_annual,8000)[0]
-k0Q = fsolve(calibrate_initial_K_quarterly,8000)[0]
+# 4.2 Define a function for solving a calibration condition for initial capital. The capital series and therefore
+#     the conditions above are linear in k0, so a single secant step through two evaluations gives the exact solution.
+#     fsolve is used from there only if the residual at that point shows that the condition is not linear.
+def solve_initial_K(residual,tol=1e-10):
+    r0 = residual(0.0)
+    r1 = residual(1.0)
+    k0 = -r0/(r1-r0)
+
+    if abs(residual(k0)) > tol*max(abs(r0),abs(r1),1):
+        k0 = fsolve(residual,k0)[0]
+
+    return k0, residual(k0)
+
+# 4.3 Compute the calibrated initial values of capital
+k0A, residualA = solve_initial_K(calibrate_initial_K_annual)
+k0Q, residualQ = solve_initial_K(calibrate_initial_K_quarterly)
 
-# 4.3 Annual capital series
+print('k0 annual:   ',round(k0A,2),' residual:',residualA)
+print('k0 quarterly:',round(k0Q,2),' residual:',residualQ)
+
+# 4.4 Annual capital series
 capitalA.data = pd.Series(capitalSeries(investmentA.data,k0A,delta),index=investmentA.data.index)
 
-# 4.4 Quarterly capital series
+# 4.5 Quarterly capital series
 capitalQ.data = pd.Series(capitalSeries(investmentQ4.data,k0Q,delta/4),index=investmentQ.data.index)
 
-# 4.5 Implied TFP vlaues
+# 4.6 Implied TFP vlaues
 tfpA.data = gdpA.data/capitalA.data**alpha/laborA.data**(1-alpha)
 tfpQ.data = gdpQ.data/capitalQ.data**alpha/laborQ.data**(1-alpha)
 
@@ -276,50 +311,31 @@ df.loc['1950-01-01':].to_csv('../csv/US_Production_Q_Data.csv',index=False)
 # In[11]:
 
 
-# 7. Compute the Solow residuals: 
-
-# 7.1 Annual residual
-capitalA_growth = capitalA.apc()
-tfpA_growth = tfpA.apc()
-laborA_growth = laborA.apc()
-gdpA_growth = gdpA.apc()
-consumptionA_growth = consumptionA.apc()
-investmentA_growth = investmentA.apc()
-governmentA_growth = governmentA.apc()
-exportsA_growth = exportsA.apc()
-importsA_growth = importsA.apc()
-
-# 7.2. Compute the Solow residual: Quarterly
-capitalQ_growth = capitalQ.apc()
-tfpQ_growth = tfpQ.apc()
-laborQ_growth = laborQ.apc()
-gdpQ_growth = gdpQ.apc()
-consumptionQ_growth = consumptionQ.apc()
-investmentQ_growth = investmentQ.apc()
-governmentQ_growth = governmentQ.apc()
-exportsQ_growth = exportsQ.apc()
-importsQ_growth = importsQ.apc()
-
-# 7.3 Adjust starting date
-capitalA_growth = capitalA_growth.window(['1950-01-01','2000-01-01'])
-tfpA_growth = tfpA_growth.window(['1950-01-01','2000-01-01'])
-laborA_growth = laborA_growth.window(['1950-01-01','2000-01-01'])
-gdpA_growth = gdpA_growth.window(['1950-01-01','2000-01-01'])
-consumptionA_growth = consumptionA_growth.window(['1950-01-01','2000-01-01'])
-investmentA_growth = investmentA_growth.window(['1950-01-01','2000-01-01'])
-governmentA_growth = governmentA_growth.window(['1950-01-01','2000-01-01'])
-exportsA_growth = exportsA_growth.window(['1950-01-01','2000-01-01'])
-importsA_growth = importsA_growth.window(['1950-01-01','2000-01-01'])
-
-capitalQ_growth = capitalQ_growth.window(['1950-01-01','2000-01-01'])
-tfpQ_growth = tfpQ_growth.window(['1950-01-01','2000-01-01'])
-laborQ_growth = laborQ_growth.window(['1950-01-01','2000-01-01'])
-gdpQ_growth = gdpQ_growth.window(['1950-01-01','2000-01-01'])
-consumptionQ_growth = consumptionQ_growth.window(['1950-01-01','2000-01-01'])
-investmentQ_growth = investmentQ_growth.window(['1950-01-01','2000-01-01'])
-governmentQ_growth = governmentQ_growth.window(['1950-01-01','2000-01-01'])
-exportsQ_growth = exportsQ_growth.window(['1950-01-01','2000-01-01'])
-importsQ_growth = importsQ_growth.window(['1950-01-01','2000-01-01'])
+# 7. Compute the Solow residuals and the growth rates of the other series
+
+# 7.1 Annual data
+growthA = transform(pd.DataFrame({
+    'capital':capitalA.data,
+    'tfp':tfpA.data,
+    'labor':laborA.data,
+    'gdp':gdpA.data,
+    'consumption':consumptionA.data,
+    'investment':investmentA.data,
+    'government':governmentA.data,
+    'exports':exportsA.data,
+    'imports':importsA.data}),growth=1,window=['1950-01-01','2000-01-01'])
+
+# 7.2 Quarterly data
+growthQ = transform(pd.DataFrame({
+    'capital':capitalQ.data,
+    'tfp':tfpQ.data,
+    'labor':laborQ.data,
+    'gdp':gdpQ.data,
+    'consumption':consumptionQ.data,
+    'investment':investmentQ.data,
+    'government':governmentQ.data,
+    'exports':exportsQ.data,
+    'imports':importsQ.data}),growth=4,window=['1950-01-01','2000-01-01'])
 
 
 # In[12]:
@@ -330,12 +346,12 @@ importsQ_growth = importsQ_growth.window(['1950-01-01','2000-01-01'])
 # 11.1 Quarterly GDP growth and the Solow residual (Quarterly)
 fig = plt.figure(figsize=(12,4)) 
 ax = fig.add_subplot(1,1,1)
-ax.plot(gdpA_growth.data,'b-',lw = 3)
-ax.plot(tfpA_growth.data,'g-',lw = 3)
+ax.plot(growthA['gdp'],'b-',lw = 3)
+ax.plot(growthA['tfp'],'g-',lw = 3)
 ax.xaxis.set_major_locator(years10)
 ax.xaxis.set_major_formatter(myFmt)
 ax.set_ylabel('Precent')
-gdpA_growth.recessions()
+fp.recessions(growthA.index[0],growthA.index[-1])
 ax.grid(True)
 ax.set_title('Annual data')
 ax.legend(['GDP growth','Solow Residual'],loc='center left', bbox_to_anchor=(1, 0.5))
@@ -344,12 +360,12 @@ ax.legend(['GDP growth','Solow Residual'],loc='center left', bbox_to_anchor=(1,
 # 11.2 Quarterly GDP growth and the Solow residual (Quarterly)
 fig = plt.figure(figsize=(12,4)) 
 ax = fig.add_subplot(1,1,1)
-ax.plot(gdpQ_growth.data,'b-',lw = 3)
-ax.plot(tfpQ_growth.data,'g-',lw = 3)
+ax.plot(growthQ['gdp'],'b-',lw = 3)
+ax.plot(growthQ['tfp'],'g-',lw = 3)
 ax.xaxis.set_major_locator(years10)
 ax.xaxis.set_major_formatter(myFmt)
 ax.set_ylabel('Precent')
-gdpQ_growth.recessions()
+fp.recessions(growthQ.index[0],growthQ.index[-1])
 ax.grid(True)
 ax.set_title('Quarterly data')
 ax.legend(['GDP growth','Solow Residual'],loc='center left', bbox_to_anchor=(1, 0.5))
@@ -358,40 +374,40 @@ ax.legend(['GDP growth','Solow Residual'],loc='center left', bbox_to_anchor=(1,
 # 11.3 Figure for website: Annual growth in Y, L, K, and A
 fig = plt.figure(figsize=(10, 6)) 
 ax = fig.add_subplot(2,2,1)
-ax.plot(tfpA_growth.data,'b-',lw = 3,alpha = 0.75)
+ax.plot(growthA['tfp'],'b-',lw = 3,alpha = 0.75)
 ax.xaxis.set_major_locator(years10)
 ax.xaxis.set_major_formatter(myFmt)
 ax.set_title('TFP Growth')
 ax.set_ylabel('Precent')
-tfpA_growth.recessions()
+fp.recessions(growthA.index[0],growthA.index[-1])
 ax.locator_params(axis='y',nbins=6)
 ax.grid(True)
 
 ax = fig.add_subplot(2,2,2)
-ax.plot(gdpA_growth.data,'b-',lw = 3,alpha = 0.75)
+ax.plot(growthA['gdp'],'b-',lw = 3,alpha = 0.75)
 ax.set_title('Real GDP Growth')
 ax.xaxis.set_major_locator(years10)
 ax.xaxis.set_major_formatter(myFmt)
-gdpA_growth.recessions()
+fp.recessions(growthA.index[0],growthA.index[-1])
 ax.grid(True)
 
 ax = fig.add_subplot(2,2,3)
-ax.plot(laborA_growth.data,'b-',lw = 3,alpha = 0.75)
+ax.plot(growthA['labor'],'b-',lw = 3,alpha = 0.75)
 ax.xaxis.set_major_locator(years10)
 ax.xaxis.set_major_formatter(myFmt)
-laborA_growth.recessions()
+fp.recessions(growthA.index[0],growthA.index[-1])
 ax.set_ylabel('Precent')
 ax.set_title('Labor Growth')
 ax.locator_params(axis='y',nbins=6)
 ax.grid(True)
 
 ax = fig.add_subplot(2,2,4)
-ax.plot(capitalA_growth.data,'b-',lw = 3,alpha = 0.75)
+ax.plot(growthA['capital'],'b-',lw = 3,alpha = 0.75)
 ax.xaxis.set_major_locator(years10)
 ax.xaxis.set_major_formatter(myFmt)
 ax.set_title('Capital Growth')
 ax.locator_params(axis='y',nbins=6)
-capitalA_growth.recessions()
+fp.recessions(growthA.index[0],growthA.index[-1])
 ax.grid(True)
 
 plt.savefig('../png/fig_US_Production_A_site.png',bbox_inches='tight')
@@ -403,37 +419,19 @@ plt.savefig('../png/fig_US_Production_A_site.png',bbox_inches='tight')
 # 10. Save growth rate data to csv files
 
 # 10.1 Annual data
-yearsA  = pd.Series(gdpA_growth.data.index.strftime('%Y').values,index=gdpA_growth.data.index)
-
-df = pd.concat([yearsA,gdpA_growth.data.round(1),
-                consumptionA_growth.data.round(1),
-                investmentA_growth.data.round(1),
-                governmentA_growth.data.round(1),
-                exportsA_growth.data.round(1),
-                importsA_growth.data.round(1),
-                capitalA_growth.data.round(1),
-                laborA_growth.data.round(1)],
-               axis=1)
+growthColumns = ['gdp','consumption','investment','government','exports','imports','capital','labor']
+growthNames = ['GDP Growth','Consumption Growth','Investment Growth','Government Purchases Growth','Exports Growth','Imports Growth','Capital Growth','Labor Growth']
 
-df.columns = ['Year','GDP Growth','Consumption Growth','Investment Growth','Government Purchases Growth','Exports Growth','Imports Growth','Capital Growth','Labor Growth']
+df = transform(growthA[growthColumns],decimals=1)
+df.columns = growthNames
+df.insert(0,'Year',df.index.strftime('%Y'))
 
 df.loc['01-01-1950':].to_csv('../csv/US_Production_A_Data_Growth_Rates.csv',index=False)
 
 
 # 10.2 Quarterly data
-datesQ  = pd.Series(gdpQ_growth.data.index.strftime('%Y-%m-%d').values,index=gdpQ_growth.data.index)
-
-df = pd.concat([datesQ,gdpQ_growth.data.round(1),
-                consumptionQ_growth.data.round(1),
-                investmentQ_growth.data.round(1),
-                governmentQ_growth.data.round(1),
-                exportsQ_growth.data.round(1),
-                importsQ_growth.data.round(1),
-                capitalQ_growth.data.round(1),
-                laborQ_growth.data.round(1)],
-               axis=1)
-
-df.columns = ['Date','GDP Growth','Consumption Growth','Investment Growth','Government Purchases Growth','Exports Growth','Imports Growth','Capital Growth','Labor Growth']
+df = transform(growthQ[growthColumns],decimals=1)
+df.columns = growthNames
+df.insert(0,'Date',df.index.strftime('%Y-%m-%d'))
 
 df.loc['1950-01-01':].to_csv('../csv/US_Production_Q_Data_Growth_Rates.csv',index=False)
-
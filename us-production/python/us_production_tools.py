@@ -0,0 +1,65 @@
+'''Sensitivity of the US capital stock and TFP series to the parameters of the perpetual inventory method.
+
+us_production_data.py constructs capital and TFP for one capital share alpha, one depreciation rate delta, and one
+number of years N used to calibrate initial capital. tfp_grid constructs them for every combination of values in a
+grid of alpha, delta, and N at once with broadcast NumPy operations.'''
+
+import numpy as np
+import pandas as pd
+
+
+def capital_grid(investment,gdp,deltas,Ns,periods_per_year=1):
+
+    '''Returns a DataFrame of capital series indexed by (delta, N) with one column per date.
+
+    investment is a Series of investment per period and gdp a Series of GDP at an annual rate with the same index.
+    deltas are annual depreciation rates. For each N, initial capital is calibrated so that the initial capital-
+    output ratio equals the average over the first N years, as in us_production_data.py.'''
+
+    i = np.asarray(investment,dtype=float)
+    y = np.asarray(gdp,dtype=float)
+    T = len(i)
+
+    deltas = np.asarray(deltas,dtype=float)
+    Ns = np.asarray(Ns,dtype=int)
+    keep = 1-deltas[:,None]/periods_per_year
+
+    # Capital is k[t] = k0*keep**t + sum over s < t of keep**(t-1-s)*i[s], linear in initial capital k0
+    t = np.arange(T)
+    lags = t[:,None]-1-t[None,:]
+    weights = np.where(lags>=0,keep[:,:,None]**np.maximum(lags,0),0)
+    w = keep**t
+    c = weights@i
+
+    # Means of capital-output ratios over the first N years for each N
+    n = Ns*periods_per_year
+    mean_w = np.cumsum(w/y,axis=1)[:,n-1]/n
+    mean_c = np.cumsum(c/y,axis=1)[:,n-1]/n
+
+    # Initial capital solves k0/y[0] = k0*mean_w + mean_c for each (delta, N)
+    k0 = mean_c/(1/y[0]-mean_w)
+
+    capital = k0[:,:,None]*w[:,None,:]+c[:,None,:]
+
+    index = pd.MultiIndex.from_product([deltas,Ns],names=['delta','N'])
+
+    return pd.DataFrame(capital.reshape(len(deltas)*len(Ns),T),index=index,columns=investment.index)
+
+
+def tfp_grid(investment,gdp,labor,alphas,deltas,Ns,periods_per_year=1):
+
+    '''Returns DataFrames of capital indexed by (delta, N) and of TFP indexed by (alpha, delta, N), each with one
+    column per date. TFP is gdp/capital**alpha/labor**(1-alpha). See capital_grid for the other arguments.'''
+
+    capital = capital_grid(investment,gdp,deltas,Ns,periods_per_year=periods_per_year)
+
+    alphas = np.asarray(alphas,dtype=float)[:,None,None]
+    k = capital.to_numpy()[None,:,:]
+    y = np.asarray(gdp,dtype=float)
+    l = np.asarray(labor,dtype=float)
+
+    tfp = y/k**alphas/l**(1-alphas)
+
+    index = pd.MultiIndex.from_tuples([(a,)+dn for a in alphas.ravel() for dn in capital.index],names=['alpha','delta','N'])
+
+    return capital, pd.DataFrame(tfp.reshape(-1,k.shape[2]),index=index,columns=capital.columns)
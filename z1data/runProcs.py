@@ -1,38 +1,110 @@
-import os,subprocess
+import os,sys,re,shutil,subprocess,tempfile,time,runpy,traceback,importlib,multiprocessing,multiprocessing.connection,concurrent.futures
 
 '''Contains programs for the management of lecture notes, slides, tables, and figures'''
 
-def tex(x=None):
-    '''Runs pdfLaTeX. Argument x can be either None, a string indicating the name of a single file, or a list. If x is None, then all files in the current directory ending with .tex will be typeset. Cleans up the residual auxiliary files.'''
+def tex(x=None,processes=1,force=False):
+    '''Runs pdfLaTeX. Argument x can be either None, a string indicating the name of a single file, or a list. If x is None, then all files in the current directory ending with .tex will be typeset. Files whose PDF is newer than the .tex file and every file it inputs are skipped unless force is True. If processes is greater than 1, that many documents are typeset at once. Cleans up the residual auxiliary files other than the .aux files, which pdfLatex reuses.'''
 
     os.chdir(os.getcwd())
 
     if x==None:
-
-        for files in os.listdir('.'):
-            if files.endswith('.tex'):
-                pdfLatex(x)
+        files = sorted([f for f in os.listdir('.') if f.endswith('.tex')])
 
     elif type(x)==str:
-        pdfLatex(x)
+        files = [x]
+
+    else:
+        files = list(x)
+
+    files = [f if f.endswith('.tex') else f+'.tex' for f in files]
+
+    if force==False:
+        files = [f for f in files if upToDate(f)==False]
+
+    if processes==1:
+        for f in files:
+            pdfLatex(f)
 
     else:
-        for files in x:
-            pdfLatex(files)
+        with concurrent.futures.ThreadPoolExecutor(processes) as pool:
+            list(pool.map(pdfLatex,files))
 
     for files in os.listdir('.'):
-        if files.endswith('.aux') or files.endswith('.log') or files.endswith('.out') or files.endswith('.gz') or files.endswith('.snm') or files.endswith('.nav') or files.endswith('.toc'):
+        if files.endswith('.log') or files.endswith('.out') or files.endswith('.gz') or files.endswith('.snm') or files.endswith('.nav') or files.endswith('.toc'):
             os.remove(files)
 
+def texInputs(fileName):
+    '''Returns the existing files that the .tex file fileName inputs, includes, or includes as graphics, searched recursively through included .tex files.'''
+
+    found = []
+    pending = [fileName]
+    pattern = re.compile(r'\\(input|include|includegraphics)\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}')
+
+    while pending:
+        current = pending.pop()
+        directory = os.path.dirname(current)
+        with open(current,errors='ignore') as f:
+            text = f.read()
+
+        for command, name in pattern.findall(text):
+            extensions = ['','.pdf','.png','.jpg','.eps'] if command=='includegraphics' else ['','.tex']
+            for ext in extensions:
+                path = os.path.join(directory,name.strip()+ext)
+                if os.path.isfile(path):
+                    if path not in found:
+                        found.append(path)
+                        if path.endswith('.tex'):
+                            pending.append(path)
+                    break
+
+    return found
+
+def upToDate(fileName):
+    '''Returns True if the PDF for the .tex file fileName exists and is newer than the .tex file and its inputs.'''
+
+    pdf = fileName[:-4]+'.pdf'
+    if os.path.exists(pdf)==False:
+        return False
+
+    return all(os.path.getmtime(f) <= os.path.getmtime(pdf) for f in [fileName]+texInputs(fileName))
+
 def pdfLatex(fileName):
-    '''Typesets filename using pdflatex'''
+    '''Typesets filename using pdflatex. Auxiliary files are written to a temporary directory and a second pass is run only if the first pass changed the .aux file. The .aux file is kept next to the PDF so that the next run starts from it.'''
+
+    if fileName.endswith('.tex')==False:
+        fileName = fileName+'.tex'
+
+    name = os.path.basename(fileName)[:-4]
+    directory = os.path.dirname(os.path.abspath(fileName))
+
+    with tempfile.TemporaryDirectory() as outputDir:
+
+        texfile = ['pdflatex','-interaction=nonstopmode','-output-directory',outputDir,os.path.basename(fileName)]
+        aux = os.path.join(outputDir,name+'.aux')
+
+        # Seed the temporary directory with the .aux file from an earlier run if there is one
+        if os.path.exists(os.path.join(directory,name+'.aux')):
+            shutil.copy(os.path.join(directory,name+'.aux'),aux)
+
+        before = auxContents(aux)
+        subprocess.call(texfile,cwd=directory,stdout=subprocess.DEVNULL)
+        if auxContents(aux)!=before:
+            subprocess.call(texfile,cwd=directory,stdout=subprocess.DEVNULL)
+
+        if os.path.exists(os.path.join(outputDir,name+'.pdf')):
+            shutil.move(os.path.join(outputDir,name+'.pdf'),os.path.join(directory,name+'.pdf'))
 
-    FNULL = open(os.devnull, 'w')
-    texfile = 'pdflatex '+fileName
-    if texfile.endswith('.tex')==False:
-        texfile = texfile+'.tex'
-    subprocess.call(texfile,shell=True,stdout=FNULL)
-    subprocess.call(texfile,shell=True,stdout=FNULL)
+        if os.path.exists(aux):
+            shutil.copy(aux,os.path.join(directory,name+'.aux'))
+
+def auxContents(aux):
+    '''Returns the lines of the .aux file aux that can change the typeset output. A missing file is empty.'''
+
+    if os.path.exists(aux)==False:
+        return []
+
+    with open(aux,errors='ignore') as f:
+        return [line for line in f if line.strip()!='\\relax' and line.startswith('\\gdef \\@abspage@last')==False]
 
 def handout(fileName):
     '''For Beamer lecture slides named fileName, a new file is created the preamble is modified to inclue the handout option.'''
@@ -53,18 +125,82 @@ def createHandouts(slideList):
         handout(s)
     return handoutList
 
-def pythonScript(script):
-    '''Runs python. script can be either a string or a list of strings.'''
+def runScript(script):
+    '''Runs the python script in the current process as if it were run with python and returns the script name, the exit status, and the wall time in seconds.'''
+
+    start = time.time()
+    sys.argv = [script]
+    sys.path.insert(0,os.path.dirname(os.path.abspath(script)))
+
+    try:
+        runpy.run_path(script,run_name='__main__')
+        status = 0
+    except SystemExit as e:
+        status = e.code if isinstance(e.code,int) else int(e.code is not None)
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+
+    return script, status, time.time()-start
+
+def scriptProcess(script):
+    '''Runs the python script with runScript and exits with its exit status. The target of the processes started by pythonScript.'''
+
+    # Use a non-interactive backend so that figures can be created without a display, unless another one is set
+    os.environ.setdefault('MPLBACKEND','Agg')
+    if 'matplotlib' in sys.modules:
+        sys.modules['matplotlib'].use(os.environ['MPLBACKEND'])
+
+    sys.exit(runScript(script)[1])
+
+def pythonScript(script,processes=None,preload=['numpy','pandas','scipy','statsmodels.api','matplotlib.pyplot']):
+    '''Runs python. script can be either a string or a list of strings. Each script runs in its own process. On Linux the processes are forked from this one after the modules in preload are imported, so each script starts with the modules already imported. Elsewhere forking is unsafe once system frameworks are loaded and the processes are spawned instead. At most processes scripts run at once, by default the number of CPUs. Prints and returns a list of (script, exit status, wall time) tuples.'''
 
     if type(script)==str:
-        if script.endswith('.py')==False:
-            script = script+".py"
-        run = subprocess.call("python "+script, shell=True)
+        script = [script]
+
+    scripts = []
+    for s in script:
+        if s.endswith('.py')==False:
+            s = s+".py"
+        scripts.append(s)
+
+    if processes==None:
+        processes = os.cpu_count() or 1
+
+    if sys.platform.startswith('linux'):
+        context = multiprocessing.get_context('fork')
+        for module in preload:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                pass
+
     else:
-        for s in script:
-            if s.endswith('.py')==False:
-                s = s+".py"
-            run = subprocess.call("python "+s, shell=True)
+        context = multiprocessing.get_context('spawn')
+
+    # Processes are not daemonic so that scripts can start processes of their own
+    results = [None]*len(scripts)
+    waiting = list(enumerate(scripts))
+    running = {}
+
+    while waiting or running:
+
+        while waiting and len(running)<processes:
+            n, s = waiting.pop(0)
+            p = context.Process(target=scriptProcess,args=(s,),daemon=False)
+            p.start()
+            running[p.sentinel] = (n,s,p,time.time())
+
+        for sentinel in multiprocessing.connection.wait(list(running)):
+            n, s, p, start = running.pop(sentinel)
+            p.join()
+            results[n] = (s,p.exitcode,time.time()-start)
+
+    for s, status, seconds in results:
+        print(s+': exit status '+str(status)+', '+str(round(seconds,2))+' s')
+
+    return results
 
 def exportNb(notebookName):
     '''Exports the ipython notebook file notebookName to a python script'''
@@ -8,10 +8,17 @@ from lxml import etree
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
-import datetime
 import requests
 import zipfile
 import os
+import re
+import json
+import glob
+import fnmatch
+import hashlib
+import collections
+import contextlib
+from xml.sax import saxutils
 import runProcs
 # get_ipython().magic('matplotlib inline')
 
@@ -21,119 +28,519 @@ import runProcs
 # 0. Define a functions for managing parsed z1 data
 
 # 0.1 Create a searchable legend in csv format
-def createLegend(root):
+def createLegend(source='FRB_Z1.zip',legendFile='z1Legend.csv'):
+    '''Streams through the z1 xml file and builds the legend in one step from the collected entries'''
 
-    legend_df = pd.DataFrame(columns=['Series Name','Description','Frequency','Start','End'])
-    x = 0
+    legend_df = legendFrame([legendEntry(levelB) for levelB in iterSeries(source)])
+    legend_df.to_csv(legendFile)
 
-    for levelA in root:
-        for levelB in levelA[4:-1]:
-            entry = []
-            ident = levelB.get('SERIES_NAME')
-            freq = ident[-1]
-            entry.append(ident)
-            for levelC in levelB:
-                for n,levelD in enumerate(levelC):
-                    if n == 0:
-                        entry.append(levelD[1].text)
-                        entry.append(freq)      
-            for levelC in [levelB[1],levelB[-1]]:
-                d= levelC.get('TIME_PERIOD')
-                d= datetime.datetime.strptime(d, '%Y-%m-%d').strftime('%m-%d-%Y')
-                entry.append(d)
-
-            legend_df.loc[x] = entry
-            x+=1
-            
-    legend_df.to_csv('z1Legend.csv')
+    return legend_df
+
+# 0.2 Stream the series elements of the z1 xml file in the zip file one at a time
+@contextlib.contextmanager
+def openZ1(fileName='FRB_Z1.zip'):
+    '''Opens the z1 xml file in the zip file fileName for reading without extracting it'''
+
+    with zipfile.ZipFile(fileName) as z, z.open('Z1_data.xml') as f:
+        yield f
+
+def scanSeries(source,chunkSize=1024*1024):
+    '''Generator that yields each Series element of the z1 xml file with the byte offsets of its start and end in
+    the file. Argument source can be either the name of the zip file or a binary file object. The file is read once
+    in chunks of chunkSize bytes that are passed both to the parser and to a scan for the Series tags. Each element
+    is cleared after it has been consumed, along with the already processed siblings, so memory use does not grow
+    with the number of series in the file.'''
+
+    if isinstance(source,str):
+        with openZ1(source) as f:
+            yield from scanSeries(f,chunkSize)
+        return
+
+    parser = etree.XMLPullParser(events=('end',),tag='{*}Series')
+    tag = re.compile(rb'<(/?)(?:\w+:)?Series\b([^>]*)>')
+    offsets = collections.deque()
+    buffer = b''
+    position = 0
+
+    while True:
+        chunk = source.read(chunkSize)
+
+        if chunk:
+            buffer += chunk
+            last = 0
+            for match in tag.finditer(buffer):
+                if match.group(1):
+                    offsets.append((opened,position+match.end()))
+                else:
+                    opened = position+match.start()
+                last = match.end()
+
+            # Keep the bytes from the last tag on, which may be cut off by the end of the chunk
+            cut = buffer.rfind(b'<',last)
+            cut = len(buffer) if cut < 0 else cut
+            position += cut
+            buffer = buffer[cut:]
+            parser.feed(chunk)
+
+        else:
+            parser.close()
+
+        for event, levelB in parser.read_events():
+            start, end = offsets.popleft()
+            yield levelB, start, end
+            levelB.clear()
+            while levelB.getprevious() is not None:
+                del levelB.getparent()[0]
+
+        if not chunk:
+            break
+
+def iterSeries(source):
+    '''Generator that yields the Series elements of the z1 xml file. See scanSeries.'''
+
+    for levelB, start, end in scanSeries(source):
+        yield levelB
+
+# 0.3 Create a legend entry for the series element levelB and a legend DataFrame from a list of entries
+def legendEntry(levelB):
+    '''Returns a list with the name, description, first date, and last date of the series in levelB'''
+
+    return [levelB.get('SERIES_NAME'),levelB[0][0][1].text,levelB[1].get('TIME_PERIOD'),levelB[-1].get('TIME_PERIOD')]
+
+def legendFrame(entries):
+    '''Converts the frequencies and dates of all entries at once'''
+
+    legend_df = pd.DataFrame(entries,columns=['Series Name','Description','Start','End'])
+    legend_df.insert(2,'Frequency',legend_df['Series Name'].str[-1])
+    for column in ['Start','End']:
+        legend_df[column] = pd.to_datetime(legend_df[column],format='%Y-%m-%d').dt.strftime('%m-%d-%Y')
 
     return legend_df
 
-# 0.2 Create a Pandas dataframe for the z1 series with code: name 
-def getSeries(name):
-    
-    dates = []
-    value= np.array([])
-    for levelA in root:
-        for levelB in levelA:
+# 0.4 Collect the observation dates and values of the series element levelB as strings
+def observations(levelB):
+
+    dates = [levelC.get('TIME_PERIOD') for levelC in levelB[1:]]
+    values = [levelC.get('OBS_VALUE') for levelC in levelB[1:]]
+
+    return dates, values
+
+# 0.5 Create a Pandas dataframe with a DatetimeIndex for the series element levelB
+def seriesFrame(levelB):
+    '''Collects the TIME_PERIOD and OBS_VALUE attributes of the series in bulk and converts them in one step each'''
+
+    description = levelB[0][0][1].text
+    dates, values = observations(levelB)
+
+    df = pd.DataFrame(np.asarray(values,dtype=float),index=pd.to_datetime(dates,format='%Y-%m-%d'),columns = [description])
+    return df
+
+# 0.6 Read the series with codes in names and the legend, and build the series index and the columnar store, in a single pass over the z1 xml file
+def parseZ1(source='FRB_Z1.zip',names=None,indexFile=None,storePath=None):
+    '''Streams through the z1 xml file once. Returns a dictionary of DataFrames keyed by series code for the series
+    with codes in names (every series if names is None), the legend as a DataFrame, and the list of series codes
+    updated in the columnar store. The series index is saved to indexFile and the columnar store in storePath is
+    updated from the same pass unless they are None, in which case the list of updated codes is None.'''
+
+    series = {}
+    entries = []
+    index = {}
+    hashes = {}
+    changed = {}
+    if storePath is not None:
+        manifest = loadManifest(storePath)
+
+    for levelB, start, end in scanSeries(source):
+        ident = levelB.get('SERIES_NAME')
+        entries.append(legendEntry(levelB))
+        index[ident] = (start,end,dict(levelB.nsmap))
+        if names is None or ident in names:
+            series[ident] = seriesFrame(levelB)
+        if storePath is not None:
+            storeChanges(levelB,manifest,hashes,changed)
+
+    legend_df = legendFrame(entries)
+
+    if indexFile is not None:
+        saveIndex(index,indexFile)
+
+    updated = None
+    if storePath is not None:
+        updated = writeStore(manifest,hashes,changed,storePath)
+
+    return series, legend_df, updated
+
+# 0.7 Create an on-disk index of the byte offsets of each series in the z1 xml file
+def createIndex(source='FRB_Z1.zip',indexFile='z1Index.json'):
+    '''Streams through the z1 xml file once and records the offsets of the start and end of each Series element and
+    the namespaces in scope at the element. The index is saved to indexFile next to the legend and returned as a
+    dictionary keyed by series code.'''
+
+    index = {levelB.get('SERIES_NAME'):(start,end,dict(levelB.nsmap)) for levelB, start, end in scanSeries(source)}
+    saveIndex(index,indexFile)
+
+    return index
+
+def saveIndex(index,indexFile='z1Index.json'):
+    '''Saves index as JSON. Each distinct set of namespaces is stored once and the series refer to it by position.'''
+
+    namespaces = []
+    series = {}
+    for ident, (start,end,nsmap) in index.items():
+        pairs = sorted(nsmap.items(),key=lambda pair: pair[0] or '')
+        if pairs not in namespaces:
+            namespaces.append(pairs)
+        series[ident] = [start,end,namespaces.index(pairs)]
+
+    with open(indexFile,'w') as f:
+        json.dump({'namespaces':namespaces,'series':series},f)
+
+# 0.8 Load the series index, rebuilding it if it is missing or older than the zip file
+def loadIndex(source='FRB_Z1.zip',indexFile='z1Index.json'):
+
+    if not os.path.exists(indexFile) or os.path.getmtime(indexFile) < os.path.getmtime(source):
+        return createIndex(source,indexFile)
+
+    with open(indexFile) as f:
+        stored = json.load(f)
+
+    namespaces = [dict(pairs) for pairs in stored['namespaces']]
+
+    return {ident:(start,end,namespaces[n]) for ident, (start,end,n) in stored['series'].items()}
+
+# 0.9 Read the series with codes in names directly from their offsets in the z1 xml file
+def readSeries(names,source='FRB_Z1.zip',index=None):
+    '''Returns a dictionary of DataFrames keyed by series code. Each series is parsed on its own from the bytes
+    recorded in index, so only the requested series are parsed. The z1 xml file is read from the zip file, which
+    is decompressed up to the last requested series.'''
+
+    if index is None:
+        index = loadIndex(source)
+
+    missing = [name for name in names if name not in index]
+    if missing:
+        raise KeyError(', '.join(missing)+' not found in z1 data')
+
+    series = {}
+    with openZ1(source) as f:
+
+        # Read in file order so that a batch of series is a single forward pass over the file
+        for ident in sorted(names,key=lambda ident: index[ident][0]):
+            start,end,nsmap = index[ident]
+            f.seek(start)
+
+            # The namespaces in scope at the element are declared on a wrapper so that the fragment can be parsed
+            declarations = ' '.join(('xmlns' if prefix is None else 'xmlns:'+prefix)+'='+saxutils.quoteattr(uri) for prefix, uri in nsmap.items())
+            levelB = etree.fromstring(b'<root '+declarations.encode()+b'>'+f.read(end-start)+b'</root>')[0]
+            series[ident] = seriesFrame(levelB)
+
+    return series
+
+# 0.10 Create a Pandas dataframe for the z1 series with code: name 
+def getSeries(name,source='FRB_Z1.zip',index=None):
+    '''Reads the series with code name using the series index. If source is a file object instead of the name of
+    the zip file, streams through the file and stops as soon as the series has been read.'''
+
+    if isinstance(source,str):
+        return readSeries([name],source,index)[name]
+
+    for levelB in iterSeries(source):
+        if levelB.get('SERIES_NAME') == name:
+            return seriesFrame(levelB)
+
+    raise KeyError(name+' not found in z1 data')
+
+# 0.11 Expand the codes and glob patterns in dataList against the series codes in codes
+def matchCodes(dataList,codes):
+    '''Returns the matching series codes without duplicates. Plain codes keep the order given in dataList and the
+    matches of a pattern like 'FL31*.Q' are in the order of codes. A pattern that matches no code is returned as it
+    is, so that it is reported as missing like a plain code that is not in codes.'''
+
+    names = []
+    for pattern in dataList:
+        matches = [pattern]
+        if any(c in pattern for c in '*?['):
+            matches = [ident for ident in codes if fnmatch.fnmatchcase(ident,pattern)] or [pattern]
+        names.extend(matches)
+
+    return list(dict.fromkeys(names))
+
+# 0.12 Create a Pandas dataframe for the z1 series with codes in dataList
+def getDataSet(dataList,source='FRB_Z1.zip'):
+    '''Argument dataList can be a single code or glob pattern or a list of them. All matching series are extracted
+    in one pass, through the series index if source is the name of the zip file or by streaming through source otherwise, and
+    joined once into a DataFrame aligned on dates. Columns are labeled by series code and description.'''
+
+    if isinstance(dataList,str):
+        dataList = [dataList]
+
+    if isinstance(source,str):
+        index = loadIndex(source)
+        names = matchCodes(dataList,list(index))
+        found = [name for name in names if name in index]
+        series = readSeries(found,source,index)
+
+    else:
+        series = {}
+        for levelB in iterSeries(source):
             ident = levelB.get('SERIES_NAME')
-            if ident in [name]:
-                for levelC in levelB:
-                    for n,levelD in enumerate(levelC):
-                        if n == 0:
-                            description = levelD[1].text
-
-                for levelC in levelB[1:]:
-                    v = levelC.get('OBS_VALUE')
-                    d= levelC.get('TIME_PERIOD')
-                    dates = np.append(dates,d)
-                    value = np.append(value,float(v))
-
-    for n,d in enumerate(dates):
-        dates[n]= datetime.datetime.strptime(d,'%Y-%m-%d').strftime('%m-%d-%Y')
-        
-    df = pd.DataFrame(value,index=dates,columns = [description])
+            if any(fnmatch.fnmatchcase(ident,pattern) for pattern in dataList):
+                series[ident] = seriesFrame(levelB)
+        names = matchCodes(dataList,list(series))
+
+    missing = [name for name in names if name not in series]
+    if missing:
+        raise KeyError(', '.join(missing)+' not found in z1 data')
+
+    df = pd.concat([series[name] for name in names],axis=1,keys=names,names=['Series Name','Description'])
     return df
 
-# 0.3 Create a Pandas dataframe for the z1 series with codes in dataList
-def getDataSet(dataList):
-    df = pd.DataFrame([])
-    for name in dataList:
-        newSeries=getSeries(name)
-        df = pd.concat([df,newSeries],axis=1, join_axes=[newSeries.index])
+# 0.13 Path of the file in the columnar store that holds the series with code ident
+def storeFile(ident,storePath='z1store'):
+    '''Series are grouped into one Parquet file per sector, given by the third and fourth characters of the code'''
+
+    return os.path.join(storePath,'sector_'+ident[2:4]+'.parquet')
+
+# 0.14 Convert the z1 release into the columnar store, rewriting only what changed since the last release
+def updateStore(source='FRB_Z1.zip',storePath='z1store'):
+    '''Writes the observations in the z1 xml file to Parquet files in storePath with columns series, date, and
+    value. A manifest of hashes of the observations of each series is kept in the store and only the sector files
+    that contain new, revised, or discontinued series are rewritten. Returns the list of changed series codes.'''
+
+    manifest = loadManifest(storePath)
+
+    # Stream through the release and keep the observations of the series whose hash changed
+    hashes = {}
+    changed = {}
+    for levelB in iterSeries(source):
+        storeChanges(levelB,manifest,hashes,changed)
+
+    return writeStore(manifest,hashes,changed,storePath)
+
+def loadManifest(storePath='z1store'):
+    '''Returns the hashes of the observations of the series in the store as a dictionary keyed by series code'''
+
+    manifestFile = os.path.join(storePath,'manifest.csv')
+    if os.path.exists(manifestFile):
+        return pd.read_csv(manifestFile,index_col=0)['Hash'].to_dict()
+
+    return {}
+
+def storeChanges(levelB,manifest,hashes,changed):
+    '''Records the hash of the observations of the series element levelB in hashes and, if it differs from the
+    hash in manifest, the observations in changed'''
+
+    ident = levelB.get('SERIES_NAME')
+    dates, values = observations(levelB)
+    hashes[ident] = hashlib.sha1(('\n'.join(dates)+'|'+'\n'.join(values)).encode()).hexdigest()
+    if manifest.get(ident) != hashes[ident]:
+        changed[ident] = pd.DataFrame({'series':ident,'date':pd.to_datetime(dates,format='%Y-%m-%d'),'value':np.asarray(values,dtype=float)})
+
+def writeStore(manifest,hashes,changed,storePath='z1store'):
+    '''Rewrites the sector files that contain the series in changed or series of manifest that are not in hashes,
+    and then the manifest. Returns the list of changed series codes.'''
+
+    removed = set(manifest) - set(hashes)
+
+    # Rewrite the affected sector files, keeping the unchanged series already in them
+    os.makedirs(storePath,exist_ok=True)
+    for fileName in sorted({storeFile(ident,storePath) for ident in list(changed)+list(removed)}):
+        frames = [changed[ident] for ident in changed if storeFile(ident,storePath) == fileName]
+        if os.path.exists(fileName):
+            old = pd.read_parquet(fileName)
+            frames.insert(0,old[~old['series'].isin(changed) & ~old['series'].isin(removed)])
+        sector_df = pd.concat(frames,ignore_index=True)
+        if len(sector_df) == 0:
+            os.remove(fileName)
+        else:
+            sector_df.sort_values(['series','date']).to_parquet(fileName,index=False)
+
+    manifest_df = pd.Series(hashes,name='Hash')
+    manifest_df.index.name = 'Series Name'
+    manifest_df.to_csv(os.path.join(storePath,'manifest.csv'))
+
+    return list(changed)
+
+# 0.15 Read series from the columnar store
+def readStore(codes=None,start=None,end=None,storePath='z1store'):
+    '''Returns a DataFrame with a column for each series with code in codes (every series if codes is None) and
+    observations between the dates start and end. Only the sector files that can contain the requested codes are
+    opened and the conditions on codes and dates are passed to the Parquet reader so that non-matching row
+    groups are skipped. Raises KeyError for codes that are not in the store.'''
+
+    filters = []
+    if codes is None:
+        files = sorted(glob.glob(os.path.join(storePath,'sector_*.parquet')))
+    else:
+        codes = list(codes)
+        manifest = loadManifest(storePath)
+        missing = [ident for ident in codes if ident not in manifest]
+        if missing:
+            raise KeyError(', '.join(missing)+' not found in z1store')
+        files = sorted({storeFile(ident,storePath) for ident in codes})
+        files = [fileName for fileName in files if os.path.exists(fileName)]
+        filters.append(('series','in',codes))
+    if start is not None:
+        filters.append(('date','>=',pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('date','<=',pd.Timestamp(end)))
+
+    frames = [pd.read_parquet(fileName,filters=filters or None) for fileName in files]
+    if not frames:
+        frames = [pd.DataFrame({'series':pd.Series(dtype=str),'date':pd.Series(dtype='datetime64[ns]'),'value':pd.Series(dtype=float)})]
+    df = pd.concat(frames,ignore_index=True).pivot(index='date',columns='series',values='value')
+    df.columns.name = None
+
+    if codes is not None:
+        df = df.reindex(columns=codes)
+
     return df
 
+# 0.16 Load the legend from csv, creating it from the z1 xml file if necessary
+def loadLegend(legendFile='z1Legend.csv',source='FRB_Z1.zip'):
 
-# In[15]:
+    if not os.path.exists(legendFile):
+        return createLegend(source,legendFile)
 
-# 1. Download .zip file and extract .xml (and other contents if necessary)
+    return pd.read_csv(legendFile,index_col=0,dtype=str)
 
+# 0.17 Index the legend by the components of the series codes and by the words in the descriptions
+def indexLegend(legend):
+    '''Returns a dictionary of lookup tables that map code prefixes (e.g. 'FL'), sectors (e.g. '54'), instruments
+    (e.g. '30611'), frequencies, and lower case description words to the row positions of legend'''
 
-# 1.1 download
-url = "http://www.federalreserve.gov/datadownload/Output.aspx?rel=Z1&filetype=zip"
+    codes = pd.Series(legend['Series Name'].values)
+    components = {
+        'prefix':codes.str[0:2],
+        'sector':codes.str[2:4],
+        'instrument':codes.str[4:9],
+        'frequency':codes.str.split('.').str[-1]
+    }
 
-file_name = "FRB_Z1.zip"
-u = requests.get(url)
+    index = {}
+    for key, values in components.items():
+        index[key] = values.groupby(values.values).indices
+
+    words = pd.Series(legend['Description'].values).str.lower().str.findall(r'[a-z0-9]+').explode().dropna()
+    index['word'] = {word:np.unique(rows) for word, rows in words.index.groupby(words.values).items()}
+
+    return index
+
+# 0.18 Search the legend
+def searchLegend(legend,index=None,prefix=None,sector=None,instrument=None,frequency=None,text=None):
+    '''Returns the rows of legend that match every given argument. text matches descriptions containing all of its
+    words, e.g. searchLegend(legend,text='life insurance asset',frequency='Q').'''
+
+    if index is None:
+        index = indexLegend(legend)
+
+    rows = np.arange(len(legend))
+    for key, value in [('prefix',prefix),('sector',sector),('instrument',instrument),('frequency',frequency)]:
+        if value is not None:
+            rows = np.intersect1d(rows,index[key].get(value,[]))
+
+    if text is not None:
+        for word in re.findall(r'[a-z0-9]+',text.lower()):
+            rows = np.intersect1d(rows,index['word'].get(word,[]))
+
+    return legend.iloc[rows]
+
+# 0.19 Download the z1 zip file only when the release has changed
+def downloadZ1(url,fileName='FRB_Z1.zip',chunkSize=1024*1024,session=None):
+    '''Keeps fileName in sync with url and returns True if a new release was downloaded. The ETag and Last-Modified
+    headers of the last download are kept in fileName+'.json' and compared with the response to a HEAD request, so an
+    unchanged release costs one request. Otherwise the file is streamed to fileName+'.part' in chunks of chunkSize
+    bytes with conditional headers, and an interrupted download of the same release is resumed with a Range
+    request.'''
+
+    if session is None:
+        session = requests.Session()
+
+    metaFile = fileName+'.json'
+    partFile = fileName+'.part'
+
+    meta = {}
+    if os.path.exists(fileName) and os.path.exists(metaFile):
+        with open(metaFile) as f:
+            meta = json.load(f)
+
+    head = session.head(url,allow_redirects=True)
+    head.raise_for_status()
+    validators = {key:head.headers.get(key) for key in ['ETag','Last-Modified']}
+
+    if meta and any(validators.values()) and all(meta.get(key) == value for key, value in validators.items()):
+        return False
 
-with open(file_name, 'wb') as f:
-    for chunk in u.iter_content(chunk_size=1024): 
-        if chunk: # filter out keep-alive new chunks
-            f.write(chunk)
-            f.flush()
-f.close()
+    headers = {}
+    if meta.get('ETag'):
+        headers['If-None-Match'] = meta['ETag']
+    if meta.get('Last-Modified'):
+        headers['If-Modified-Since'] = meta['Last-Modified']
 
-# 1.2 extract
+    # Resume a partial download only if the server can confirm that it is of the same release
+    offset = 0
+    if os.path.exists(partFile) and any(validators.values()):
+        offset = os.path.getsize(partFile)
+        headers['Range'] = 'bytes='+str(offset)+'-'
+        headers['If-Range'] = validators['ETag'] or validators['Last-Modified']
 
-fh = open('FRB_Z1.zip', 'rb')
-z = zipfile.ZipFile(fh)
-for name in ['Z1_data.xml']:
-    outpath = ""
-    z.extract(name, outpath)
-fh.close()
+    with session.get(url,headers=headers,stream=True) as u:
 
-# with zipfile.ZipFile('FRB_Z1.zip', "r") as z:
-#     z.extractall()
+        if u.status_code == 304:
+            return False
+        u.raise_for_status()
 
-# 1.3 Remove the zip file
-os.remove('FRB_Z1.zip')
+        with open(partFile,'ab' if u.status_code == 206 else 'wb') as f:
+            for chunk in u.iter_content(chunk_size=chunkSize):
+                f.write(chunk)
+
+        validators = {key:u.headers.get(key,validators[key]) for key in validators}
+
+    os.replace(partFile,fileName)
+    with open(metaFile,'w') as f:
+        json.dump(validators,f)
+
+    return True
+
+
+# In[15]:
+
+# 1. Download the .zip file if a new release is available. The .xml file is read directly from the zip file
+
+
+# 1.1 download
+url = "http://www.federalreserve.gov/datadownload/Output.aspx?rel=Z1&filetype=zip"
+
+file_name = "FRB_Z1.zip"
+newRelease = downloadZ1(url,file_name)
 
 
 # In[16]:
 
 # 2. Import the xml data and create a legend
 
-# 2.2 parse
-tree = etree.parse("Z1_data.xml")
-root = tree.getroot()
+# 2.1 for a new release, parse the series needed below and the legend, and build the series index and update the
+# columnar store with the series that changed since the previous release, in one streaming pass. Otherwise read
+# the series with the index
+if newRelease or not all(os.path.exists(f) for f in ['z1Legend.csv','z1Index.json','z1store']):
+    series, legend, changed = parseZ1(file_name,names=['FL313161113.A'],indexFile='z1Index.json',storePath='z1store')
+    print(len(changed),'series updated in z1store')
+
+    # 2.2 create a legend in csv format
+    legend.to_csv('z1Legend.csv')
+
+else:
+    series = readSeries(['FL313161113.A'],file_name)
+    legend = loadLegend('z1Legend.csv',file_name)
 
-# 2.2 create a legend in csv format
-# legend= createLegend(root)
+# 2.3 index the legend for searches, e.g. searchLegend(legend,legendIndex,text='life insurance asset')
+legendIndex = indexLegend(legend)
 
 
 # In[17]:
 
 # 3. Sample plot: US T-bill volume
-tBills = getSeries('FL313161113.A')
+tBills = series['FL313161113.A']
 tBills.plot(x_compat=True)
 
 